@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from celulas import somar_celulas
+from indices import IndiceFiltros
+from motores import obter_motor
+
+# Medidas aditivas guardadas em cada célula do cubo
+MEDIDAS = ["n", "soma_solu", "n_solu", "soma_atend", "n_atend",
+           "soma_nota", "n_nota", "sla", "criticos"]
+
+
+def medidas_linhas(df):
+    # Uma linha de medidas por chamado, pronta para ser somada por célula
+    solu = df["Solu. Real (dias)"]
+    atend = df["Atend. Real (dias)"]
+    nota = df["Nota"].astype("float64")
+    return pd.DataFrame({
+        "n": np.ones(len(df), dtype=np.int64),
+        "soma_solu": solu.fillna(0).to_numpy(),
+        "n_solu": solu.notna().to_numpy(dtype=np.int64),
+        "soma_atend": atend.fillna(0).to_numpy(),
+        "n_atend": atend.notna().to_numpy(dtype=np.int64),
+        "soma_nota": nota.fillna(0).to_numpy(),
+        "n_nota": nota.notna().to_numpy(dtype=np.int64),
+        "sla": df["SLA Cumprido"].to_numpy(dtype=np.int64),
+        "criticos": df["NV. Prioridade"].str.lower().eq("crítico").to_numpy(dtype=np.int64),
+    }, index=df.index)
+
+
+def agregar(df, dimensoes, motor=None):
+    """Soma as medidas por combinação das dimensões (uma célula por combinação presente)."""
+    medidas = medidas_linhas(df)
+    for coluna in dimensoes:
+        medidas[coluna] = df[coluna]
+    return (motor or obter_motor()).agrupar(
+        medidas, list(dimensoes), {m: ("soma", m) for m in MEDIDAS})
+
+
+def _razao(soma, n):
+    return soma / n if n else np.nan
+
+
+def kpis(celulas):
+    """KPIs dos cards e do Relatório Inteligente a partir das células que passaram no filtro."""
+    total = celulas["n"].sum()
+    n_nota = celulas["n_nota"].sum()
+    resultado = {
+        "total": int(total),
+        "media_resolucao": _razao(celulas["soma_solu"].sum(), celulas["n_solu"].sum()),
+        "media_atendimento": _razao(celulas["soma_atend"].sum(), celulas["n_atend"].sum()),
+        "media_nota": _razao(celulas["soma_nota"].sum(), n_nota),
+        "qtd_avaliacoes": int(n_nota),
+        "qtd_critico": int(celulas["criticos"].sum()),
+        "sla_pct": _razao(celulas["sla"].sum(), total) * 100,
+    }
+
+    por_status = celulas.groupby("Status", observed=True)["n"].sum()
+    resultado["pct_status"] = por_status / total * 100 if total else por_status.iloc[:0]
+
+    # Rankings do Relatório Inteligente
+    por_analista = celulas.groupby("Analista", observed=True)[["soma_nota", "n_nota"]].sum()
+    por_analista = por_analista[por_analista["n_nota"] > 0]
+    notas = (por_analista["soma_nota"] / por_analista["n_nota"]).sort_values(ascending=False)
+    resultado["analista_top"] = notas.index[0] if len(notas) else "N/A"
+    resultado["nota_top_analista"] = notas.iloc[0] if len(notas) else 0
+
+    por_setor = celulas.groupby("Setor", observed=True)[["soma_solu", "n_solu"]].sum()
+    por_setor = por_setor[por_setor["n_solu"] > 0]
+    solucao = (por_setor["soma_solu"] / por_setor["n_solu"]).sort_values()
+    resultado["setor_top"] = solucao.index[0] if len(solucao) else "N/A"
+
+    por_loja = celulas.groupby("Loja", observed=True)["n_nota"].sum()
+    por_loja = por_loja[por_loja > 0].sort_values(ascending=False)
+    resultado["loja_top"] = por_loja.index[0] if len(por_loja) else "N/A"
+    resultado["qtd_av_loja_top"] = int(por_loja.iloc[0]) if len(por_loja) else 0
+    return resultado
+
+
+class Cuboide:
+    """Células com as medidas aditivas por combinação de um conjunto de dimensões."""
+
+    def __init__(self, celulas, dimensoes, indice=None, chaves=None):
+        self.dimensoes = list(dimensoes)
+        self.celulas = celulas
+        self.indice = indice or IndiceFiltros(celulas, self.dimensoes, coluna_tempo=None)
+        # Chave de cada célula (celulas.Chaves), montada na primeira atualização
+        self._chaves = chaves
+
+    def atualizar(self, removidas, adicionadas):
+        # Medidas das linhas que mudaram (a versão antiga com sinal trocado) somadas só
+        # nas células delas; o índice é reaproveitado se nenhuma célula entrou ou saiu
+        partes = []
+        for linhas, sinal in [(removidas, -1), (adicionadas, 1)]:
+            medidas = medidas_linhas(linhas) * sinal
+            for coluna in self.dimensoes:
+                medidas[coluna] = linhas[coluna]
+            partes.append(medidas)
+        celulas, chaves, mesmas = somar_celulas(
+            self.celulas, pd.concat(partes, ignore_index=True), self.dimensoes, MEDIDAS,
+            self._chaves)
+        return Cuboide(celulas, self.dimensoes, self.indice if mesmas else None, chaves)
+
+    def filtrar(self, selecoes):
+        return self.celulas.iloc[self.indice.filtrar(selecoes)]
+
+
+class CuboKPI:
+    """Cubo materializado para os KPIs, com as medidas aditivas por célula.
+
+    Guarda um reticulado de cuboides: o grão completo (todas as dimensões de filtro)
+    e versões agregadas sem as dimensões de alta cardinalidade em `opcionais`, bem
+    menores. Cada consulta usa o menor cuboide que cobre os filtros ativos, filtra
+    as células pelo índice de bitmaps e soma. Pode ser atualizado com as linhas que
+    saíram e entraram numa ingestão incremental.
+    """
+
+    def __init__(self, cuboides):
+        self.cuboides = sorted(cuboides, key=lambda c: len(c.celulas))
+
+    @classmethod
+    def de_linhas(cls, df, dimensoes, opcionais=("Solicitante",)):
+        completo = Cuboide(agregar(df, list(dimensoes)), dimensoes)
+        cuboides = [completo]
+        reduzidas = [c for c in dimensoes if c not in opcionais]
+        if len(reduzidas) < len(completo.dimensoes):
+            celulas = completo.celulas.groupby(
+                reduzidas, observed=True)[MEDIDAS].sum().reset_index()
+            cuboides.append(Cuboide(celulas, reduzidas))
+        return cls(cuboides)
+
+    def atualizar(self, removidas, adicionadas):
+        return CuboKPI([c.atualizar(removidas, adicionadas) for c in self.cuboides])
+
+    def filtrar(self, selecoes):
+        ativos = {c: v for c, v in selecoes.items() if v is not None}
+        for cuboide in self.cuboides:
+            if set(ativos) <= set(cuboide.dimensoes):
+                return cuboide.filtrar(ativos)
+        raise KeyError(f"Nenhum cuboide cobre os filtros {sorted(ativos)}")
+
+    def kpis(self, selecoes):
+        return kpis(self.filtrar(selecoes))
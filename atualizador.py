@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+
+from dados import TTL_SNAPSHOT, carregar_dados
+from geo import preparar_geojson
+
+logger = logging.getLogger(__name__)
+
+# De quantos em quantos segundos a thread confere se o snapshot venceu (o download
+# em si só acontece quando passa o TTL do snapshot, DASH_SNAPSHOT_TTL)
+VERIFICACAO = int(os.environ.get("DASH_VERIFICACAO", str(min(TTL_SNAPSHOT, 15))))
+# Processos que montam os gráficos das seções (DASH_GRAFICOS_PROCESSOS, ver o pool em
+# graficos.py); 0 ou 1 monta em sequência, na thread da sessão. Desligado por padrão:
+# o ganho ainda não foi medido numa máquina com vários núcleos
+PROCESSOS_GRAFICOS = int(os.environ.get("DASH_GRAFICOS_PROCESSOS", "0"))
+
+
+def aquecer(dataset):
+    # Constrói as estruturas derivadas antes da versão ficar visível para as sessões
+    dataset.indice
+    dataset.cubo
+    dataset.quantis.construir()
+    dataset.termos
+    for evento, grao in [("abertura", "dia"), ("encerramento", "mes"),
+                         ("abertura", "hora_semana")]:
+        dataset.series.serie(evento, grao)
+    # Tudo que dependia da versão anterior já foi construído: ela pode ser liberada
+    dataset.soltar_anterior()
+    return dataset
+
+
+class Atualizador:
+    """Mantém a versão atual dos chamados, atualizada por uma única thread do processo.
+
+    As sessões só leem `dataset`; a próxima versão (com índices e agregados) é
+    montada em segundo plano e publicada trocando essa referência de uma vez. Quem
+    estiver no meio de uma execução continua com a versão que leu no começo.
+    """
+
+    def __init__(self, ttl=TTL_SNAPSHOT, verificacao=VERIFICACAO, carregar=carregar_dados,
+                 processos_graficos=PROCESSOS_GRAFICOS):
+        self.ttl = ttl
+        self.verificacao = verificacao
+        self._carregar = carregar
+        self.processos_graficos = processos_graficos
+        self.dataset = None
+        self.atualizado_em = None
+        self.erro = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        # A primeira versão vem do snapshot local, mesmo vencido, para não esperar a
+        # fonte; sem snapshot (instalação nova) não tem jeito, baixa aqui mesmo
+        self.dataset = self._preparar(self._carregar(ttl=float("inf")))
+        self.atualizado_em = time.time()
+        self._thread = threading.Thread(target=self._rodar, name="dash-atualizador", daemon=True)
+        self._thread.start()
+        return self
+
+    def _preparar(self, dataset):
+        aquecer(dataset)
+        if self.processos_graficos > 1:
+            # Fork com a versão aquecida e ainda não publicada (nenhuma sessão segura as
+            # travas dela); plotly só é importado aqui se o pool estiver ligado
+            import graficos
+
+            graficos.abrir_processos(dataset, self.processos_graficos)
+        return dataset
+
+    def _rodar(self):
+        # Malha do mapa: numa instalação nova, baixada e simplificada aqui uma única vez
+        preparar_geojson()
+        espera = 0
+        while not self._parar.wait(espera):
+            self.atualizar()
+            espera = self.verificacao
+
+    def atualizar(self):
+        """Revalida a fonte se o snapshot venceu e publica a nova versão, se houver."""
+        try:
+            novo = self._carregar(ttl=self.ttl)
+            if novo is not self.dataset:
+                self._preparar(novo)
+                self.dataset = novo
+                logger.info("Nova versão dos dados publicada: %s", novo.versao[:12])
+        except Exception as erro:
+            # Falhou: as sessões seguem com a versão atual e a próxima rodada tenta de novo
+            logger.warning("Falha ao atualizar os dados: %s", erro)
+            self.erro = erro
+            return False
+        self.atualizado_em = time.time()
+        self.erro = None
+        return True
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.processos_graficos > 1:
+            import graficos
+
+            graficos.fechar_processos()
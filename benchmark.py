@@ -0,0 +1,226 @@
+"""Benchmark das etapas do dashboard em volumes crescentes de chamados sintéticos.
+
+Uso:
+    python benchmark.py                                  # 10k, 100k, 1M e 10M linhas
+    python benchmark.py --tamanhos 10000 100000 --saida atual.json
+    python benchmark.py --tamanhos 100000 --base atual.json --tolerancia 0.25
+
+Cada tamanho roda num processo novo (assim o pico de memória é só dele), com dados
+de `sintetico.py` gravados como CSV e carregados pelo mesmo caminho do app. Para
+cada etapa (carga, índices, filtro, KPIs, montagem das abas e serialização das
+figuras) informa o tempo de parede, o pico de memória do processo até ali e, na
+serialização, o tamanho em bytes do que iria para o navegador. Com --base, compara
+com uma rodada anterior e termina com código 1 se alguma etapa ficar mais lenta que
+a tolerância; um tamanho que estoura a memória aparece como falha (limite de
+capacidade), sem interromper os demais.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de memória
+    resource = None
+
+TAMANHOS = [10_000, 100_000, 1_000_000, 10_000_000]
+# Filtros sorteados por tamanho (mais o "todos"), para o tempo médio de filtro e KPIs
+CONSULTAS = 20
+# Diferença mínima (s) para contar como regressão; abaixo disso é ruído
+MINIMO_REGRESSAO = 0.05
+
+
+def pico_memoria_mb():
+    if resource is None:
+        return None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Medidor:
+    """Cronometra etapas em sequência, guardando tempo, pico de memória e extras."""
+
+    def __init__(self):
+        self.etapas = []
+
+    def medir(self, nome, funcao, consultas=None, **extras):
+        # Com `consultas`, a função roda várias consultas e o tempo sai por consulta
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = (time.perf_counter() - inicio) / (consultas or 1)
+        if consultas:
+            extras["consultas"] = consultas
+        self.etapas.append({"etapa": nome, "segundos": round(segundos, 6),
+                            "pico_mb": pico_memoria_mb(), **extras})
+        print(f"  {nome:<22} {segundos * 1000:10.1f} ms  pico {pico_memoria_mb()} MB",
+              file=sys.stderr, flush=True)
+        return resultado
+
+
+def _bytes_itens(itens):
+    # O que o Streamlit mandaria ao navegador: JSON das figuras e bytes das imagens
+    total = 0
+    for tipo, conteudo in itens:
+        if tipo == "grafico":
+            total += len(conteudo.to_json().encode("utf-8"))
+        elif tipo == "imagem" and isinstance(conteudo, bytes):
+            total += len(conteudo)
+    return total
+
+
+def rodar_tamanho(linhas, pasta, semente=0):
+    """Roda todas as etapas para `linhas` chamados (no processo atual)."""
+    import dados
+    from agregados import agregar, kpis
+    from atualizador import aquecer
+    from dados import FILTROS, carregar_dados
+    from esbocos import percentis_linhas
+    from graficos import imagem_nuvem, montar_avaliacao, montar_equipe, montar_indicadores
+    from paridade import sortear_selecoes
+    from sintetico import gerar_chamados, gravar_csv
+
+    medidor = Medidor()
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    csv = pasta / f"chamados_{linhas}_{semente}.csv"
+    if not csv.exists():
+        # O CSV gerado é reaproveitado entre rodadas (a geração não é etapa do app)
+        bruto = medidor.medir("geração", lambda: gerar_chamados(linhas, semente))
+        medidor.medir("gravar CSV", lambda: gravar_csv(bruto, csv))
+        del bruto
+    cache = pasta / f"cache_{linhas}_{semente}"
+    for arquivo in cache.glob("*"):
+        arquivo.unlink()
+
+    def carregar(ttl):
+        dados._ultimo_dataset = None
+        return carregar_dados(str(csv), ttl=ttl, pasta=cache)
+
+    medidor.medir("carga (CSV)", lambda: carregar(0), bytes_csv=csv.stat().st_size)
+    dataset = medidor.medir("carga (snapshot)", lambda: carregar(float("inf")))
+    df = dataset.df
+    medidor.medir("índices", lambda: aquecer(dataset))
+
+    consultas = sortear_selecoes(df, CONSULTAS, semente)
+    # O filtro devolve o bitmap; as posições só são montadas quando alguém as usa
+    selecionadas = medidor.medir(
+        "filtro (bitmap)", lambda: [dataset.indice.selecionar(s) for s in consultas],
+        len(consultas))
+    filtradas = medidor.medir(
+        "filtro (posições)", lambda: [s.posicoes for s in selecionadas], len(consultas))
+    medidor.medir("kpis (cubo)", lambda: [dataset.cubo.kpis(s) for s in consultas],
+                  len(consultas))
+    medidor.medir("kpis (linhas)",
+                  lambda: [kpis(agregar(df.iloc[p], FILTROS)) for p in filtradas],
+                  len(consultas))
+    medidor.medir("percentis (esboços)",
+                  lambda: [dataset.quantis.percentis(s) for s in consultas], len(consultas))
+    medidor.medir("percentis (linhas)",
+                  lambda: [percentis_linhas(df.iloc[p]) for p in filtradas], len(consultas))
+
+    # Abas montadas sobre todos os chamados (o pior caso de uma sessão)
+    todas = {c: None for c in FILTROS}
+    kpis_todos = dataset.cubo.kpis(todas)
+
+    def nuvem():
+        return imagem_nuvem(dataset.termos.frequencias(), png=True)
+
+    abas = {
+        "indicadores": lambda: montar_indicadores(df, nuvem, dataset.series, todas),
+        "equipe": lambda: montar_equipe(df),
+        "avaliação": lambda: montar_avaliacao(df, kpis_todos["media_nota"]),
+    }
+    itens = []
+    for nome, montar in abas.items():
+        itens += medidor.medir(f"aba: {nome}", montar)
+    medidor.medir("serialização", lambda: _bytes_itens(itens))
+    medidor.etapas[-1]["bytes"] = _bytes_itens(itens)
+    medidor.etapas[-1]["figuras"] = sum(tipo == "grafico" for tipo, _ in itens)
+    return {"linhas": linhas, "linhas_validas": len(df), "etapas": medidor.etapas}
+
+
+def rodar(tamanhos, pasta, semente=0):
+    """Roda cada tamanho num subprocesso; falhas (ex.: falta de memória) viram registro."""
+    resultados = []
+    for linhas in tamanhos:
+        print(f"{linhas:,} linhas", file=sys.stderr, flush=True)
+        processo = subprocess.run(
+            [sys.executable, __file__, "--um", str(linhas), "--pasta", str(pasta),
+             "--semente", str(semente)],
+            cwd=Path(__file__).resolve().parent, stdout=subprocess.PIPE, text=True)
+        if processo.returncode != 0:
+            resultados.append({"linhas": linhas, "erro": f"código de saída {processo.returncode}"})
+            continue
+        resultados.append(json.loads(processo.stdout))
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Etapas que ficaram mais lentas que `base` além da tolerância relativa."""
+    anteriores = {(r["linhas"], e["etapa"]): e["segundos"]
+                  for r in base for e in r.get("etapas", [])}
+    regressoes = []
+    for resultado in resultados:
+        if "erro" in resultado:
+            if any(r["linhas"] == resultado["linhas"] and "erro" not in r for r in base):
+                regressoes.append((resultado["linhas"], "execução", None, None))
+            continue
+        for etapa in resultado["etapas"]:
+            antes = anteriores.get((resultado["linhas"], etapa["etapa"]))
+            agora = etapa["segundos"]
+            # Nas etapas por consulta, o mínimo vale para o tempo somado das consultas
+            if (antes is not None and agora > antes * (1 + tolerancia)
+                    and (agora - antes) * etapa.get("consultas", 1) > MINIMO_REGRESSAO):
+                regressoes.append((resultado["linhas"], etapa["etapa"], antes, agora))
+    return regressoes
+
+
+def imprimir(resultados):
+    for resultado in resultados:
+        if "erro" in resultado:
+            print(f"\n{resultado['linhas']:,} linhas: FALHOU ({resultado['erro']})")
+            continue
+        print(f"\n{resultado['linhas']:,} linhas ({resultado['linhas_validas']:,} válidas)")
+        for etapa in resultado["etapas"]:
+            extra = f"  {etapa['bytes'] / 1024:,.0f} KB em {etapa['figuras']} figuras" \
+                if "bytes" in etapa else ""
+            por = " / consulta" if "consultas" in etapa else ""
+            print(f"  {etapa['etapa']:<22} {etapa['segundos'] * 1000:11.1f} ms{por:<11}"
+                  f" pico {etapa['pico_mb']} MB{extra}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS)
+    parser.add_argument("--pasta", help="onde guardar CSVs e snapshots (padrão: temporária)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--base", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="aumento relativo de tempo aceito antes de acusar regressão")
+    parser.add_argument("--um", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.um is not None:
+        # Subprocesso de um único tamanho: resultado em JSON na saída padrão
+        print(json.dumps(rodar_tamanho(args.um, args.pasta, args.semente), ensure_ascii=False))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as temporaria:
+        resultados = rodar(args.tamanhos, args.pasta or temporaria, args.semente)
+    imprimir(resultados)
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultados, ensure_ascii=False, indent=2),
+                                    encoding="utf-8")
+    if args.base:
+        base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+        regressoes = comparar(resultados, base, args.tolerancia)
+        for linhas, etapa, antes, agora in regressoes:
+            detalhe = "falhou" if antes is None else f"{antes * 1000:.1f} -> {agora * 1000:.1f} ms"
+            print(f"REGRESSÃO {linhas:,} linhas, {etapa}: {detalhe}")
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,274 @@
+"""Teste de carga: várias sessões simultâneas usando a barra lateral do dashboard.
+
+Uso:
+    python carga.py                                   # 1, 2, 4 e 8 sessões, 100 mil chamados
+    python carga.py --sessoes 1 4 16 --acoes 30 --linhas 1000000 --saida carga.json
+    python carga.py --fonte chamados.csv --sessoes 8
+
+Cada sessão é um `AppTest` (execução headless do app.py) num processo próprio: o
+AppTest troca o Runtime global do Streamlit a cada execução, então duas sessões não
+podem rodar ao mesmo tempo no mesmo processo. Todas partem juntas do mesmo snapshot
+(montado antes, como num servidor já aquecido) e disputam CPU e disco de verdade;
+o que não é medido é o ganho dos caches compartilhados entre sessões de um mesmo
+servidor, então os números são um limite superior. Depois da primeira execução,
+cada sessão repete ações sorteadas da barra lateral (desmarcar "Selecionar todas
+as lojas" e escolher lojas, escolher meses, filtrar um período, trocar de aba,
+voltar ao padrão) e mede o tempo de cada rerun. Para cada número de sessões,
+informa os percentis de latência, o throughput (reruns por segundo) e a memória
+de cada processo. Os dados vêm de um CSV local (por padrão gerado por
+`sintetico.py`), nunca da planilha.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+APP = Path(__file__).resolve().with_name("app.py")
+SESSOES = [1, 2, 4, 8]
+ACOES = 15
+ABAS = ["🧠 Relatório Inteligente", "📊 Indicadores Gerais",
+        "📈 Desempenho por Equipe", "⭐Avaliação"]
+
+
+def memoria_mb():
+    """(memória atual, pico) do processo em MB; None onde não dá para medir."""
+    atual = pico = None
+    try:
+        with open("/proc/self/statm") as arquivo:
+            atual = int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico /= 2 ** 20 if sys.platform == "darwin" else 2 ** 10
+    except ImportError:
+        pass
+    return (round(atual, 1) if atual else None), (round(pico, 1) if pico else None)
+
+
+# Ações da barra lateral: cada uma mexe nos widgets do AppTest e devolve seu nome
+
+def _widget(lista, rotulo):
+    return next(w for w in lista if w.label == rotulo)
+
+
+def _sortear(rng, opcoes, maximo=3):
+    k = min(len(opcoes), int(rng.integers(1, maximo + 1)))
+    return [opcoes[i] for i in rng.choice(len(opcoes), k, replace=False)]
+
+
+def alternar_lojas(at, rng):
+    todas = _widget(at.checkbox, "Selecionar todas as lojas")
+    if todas.value:
+        todas.uncheck()
+        at.run()
+        lojas = _widget(at.multiselect, "Lojas:")
+        lojas.set_value(_sortear(rng, lojas.options))
+    else:
+        todas.check()
+    return "lojas"
+
+
+def escolher_meses(at, rng):
+    todos = _widget(at.checkbox, "Selecionar todos os meses")
+    if todos.value:
+        todos.uncheck()
+        at.run()
+    meses = _widget(at.multiselect, "Meses:")
+    meses.set_value(_sortear(rng, meses.options))
+    return "meses"
+
+
+def filtrar_periodo(at, rng):
+    periodo = _widget(at.checkbox, "Selecionar por período")
+    if not periodo.value:
+        periodo.check()
+        at.run()
+    campo = _widget(at.date_input, "Selecione o período:")
+    inicio, fim = campo.value
+    dias = max((fim - inicio).days, 1)
+    de = inicio + timedelta(days=int(rng.integers(0, dias)))
+    ate = min(fim, de + timedelta(days=int(rng.integers(7, 90))))
+    campo.set_value((de, ate))
+    return "período"
+
+
+def trocar_aba(at, rng):
+    at.session_state["aba"] = ABAS[rng.integers(len(ABAS))]
+    return "aba"
+
+
+def voltar_padrao(at, rng):
+    for rotulo in ["Selecionar todas as lojas", "Selecionar todos os meses"]:
+        _widget(at.checkbox, rotulo).check()
+    _widget(at.checkbox, "Selecionar por período").uncheck()
+    return "padrão"
+
+
+# Ação -> peso no sorteio (a maior parte do uso é filtrar lojas e meses)
+CENARIO = {alternar_lojas: 3, escolher_meses: 3, filtrar_periodo: 2,
+           trocar_aba: 2, voltar_padrao: 1}
+
+
+def sessao(numero, acoes, semente, timeout, pensar, largada, resultados):
+    """Uma sessão (em processo próprio): primeira execução e `acoes` interações."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng([semente, numero])
+    funcoes, pesos = list(CENARIO), np.array(list(CENARIO.values()), dtype=float)
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    medidas = []
+
+    def rerun(tipo):
+        inicio = time.perf_counter()
+        try:
+            at.run()
+            erro = [e.message for e in at.exception][:1]
+        except Exception as excecao:
+            erro = [repr(excecao)]
+        medidas.append({"acao": tipo, "ms": (time.perf_counter() - inicio) * 1000,
+                        "erro": erro[0] if erro else None})
+
+    largada.wait()
+    rerun("abertura")
+    for _ in range(acoes):
+        if pensar:
+            time.sleep(rng.exponential(pensar))
+        try:
+            tipo = funcoes[rng.choice(len(funcoes), p=pesos / pesos.sum())](at, rng)
+        except (StopIteration, ValueError) as excecao:
+            # Widget ausente (ex.: a execução anterior falhou): registra e segue
+            medidas.append({"acao": "interação", "ms": 0.0, "erro": repr(excecao)})
+            continue
+        rerun(tipo)
+    atual, pico = memoria_mb()
+    resultados.put({"sessao": numero, "medidas": medidas, "memoria_mb": atual,
+                    "pico_memoria_mb": pico})
+
+
+def rodar_nivel(sessoes, acoes, semente, timeout, pensar=0.0):
+    """Roda `sessoes` sessões ao mesmo tempo e resume latência, throughput e memória."""
+    # "spawn": cada sessão começa num interpretador limpo, como um processo de servidor
+    contexto = multiprocessing.get_context("spawn")
+    largada = contexto.Barrier(sessoes + 1)
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=sessao, name=f"sessao-{i}",
+                                  args=(i, acoes, semente, timeout, pensar, largada, fila))
+                 for i in range(sessoes)]
+    for processo in processos:
+        processo.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    # Lê a fila antes do join (um processo com dados pendentes na fila não termina)
+    por_sessao = []
+    while len(por_sessao) < sessoes and (any(p.is_alive() for p in processos)
+                                         or not fila.empty()):
+        try:
+            por_sessao.append(fila.get(timeout=1))
+        except queue.Empty:
+            continue
+    duracao = time.perf_counter() - inicio
+    for processo in processos:
+        processo.join()
+
+    medidas = [m for s in por_sessao for m in s["medidas"]]
+    reruns = [m for m in medidas if m["acao"] != "interação"]
+    tempos = np.array([m["ms"] for m in reruns if m["acao"] != "abertura"])
+    aberturas = np.array([m["ms"] for m in reruns if m["acao"] == "abertura"])
+    memorias = [s["memoria_mb"] for s in por_sessao if s["memoria_mb"]]
+    picos = [s["pico_memoria_mb"] for s in por_sessao if s["pico_memoria_mb"]]
+    resumo = {
+        "sessoes": sessoes,
+        "reruns": len(reruns),
+        # Sessão que morreu sem devolver resultado (ex.: falta de memória) conta como erro
+        "erros": sum(m["erro"] is not None for m in medidas) + sessoes - len(por_sessao),
+        "duracao_s": round(duracao, 2),
+        "throughput_rps": round(len(reruns) / duracao, 2) if duracao else None,
+        "abertura_p50_ms": round(float(np.percentile(aberturas, 50)), 1) if len(aberturas) else None,
+        "memoria_mb": round(max(memorias), 1) if memorias else None,
+        "pico_memoria_mb": round(max(picos), 1) if picos else None,
+        # Soma das memórias atuais; conta mais de uma vez as páginas do snapshot, que
+        # são compartilhadas entre os processos (memory-map)
+        "memoria_total_mb": round(sum(memorias), 1) if memorias else None,
+    }
+    if len(tempos):
+        for p in (50, 90, 99):
+            resumo[f"p{p}_ms"] = round(float(np.percentile(tempos, p)), 1)
+        resumo["max_ms"] = round(float(tempos.max()), 1)
+    resumo["por_acao"] = {
+        acao: round(float(np.percentile([m["ms"] for m in reruns if m["acao"] == acao], 50)), 1)
+        for acao in sorted({m["acao"] for m in reruns})
+    }
+    exemplos = [m["erro"] for m in medidas if m["erro"]]
+    if exemplos:
+        resumo["exemplo_erro"] = exemplos[0][:300]
+    return resumo
+
+
+def imprimir(resumos):
+    # Memória: maior RSS atual e maior pico entre os processos das sessões
+    print(f"{'sessões':>7} {'reruns':>6} {'erros':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+          f" {'rerun/s':>8} {'abertura':>9} {'RSS MB':>8} {'pico MB':>8} {'soma MB':>8}")
+    for r in resumos:
+        print(f"{r['sessoes']:>7} {r['reruns']:>6} {r['erros']:>5} {r.get('p50_ms', '-'):>8}"
+              f" {r.get('p90_ms', '-'):>8} {r.get('p99_ms', '-'):>8} {r['throughput_rps']:>8}"
+              f" {r['abertura_p50_ms']!s:>9} {r['memoria_mb']!s:>8} {r['pico_memoria_mb']!s:>8}"
+              f" {r['memoria_total_mb']!s:>8}")
+
+
+def preparar_fonte(fonte, linhas, semente, pasta):
+    """Aponta o app para um CSV local (gerado se não for informado) e um cache próprio."""
+    if fonte is None:
+        from sintetico import gerar_chamados, gravar_csv
+
+        fonte = Path(pasta) / f"chamados_{linhas}_{semente}.csv"
+        gravar_csv(gerar_chamados(linhas, semente), fonte)
+    os.environ["DASH_FONTE_DADOS"] = str(Path(fonte).resolve())
+    os.environ["DASH_CACHE_DIR"] = str(Path(pasta) / "cache")
+    # Snapshot montado uma vez aqui; as sessões só abrem o arquivo (memory-map)
+    from dados import carregar_dados
+
+    carregar_dados(ttl=0)
+    return fonte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, nargs="+", default=SESSOES)
+    parser.add_argument("--acoes", type=int, default=ACOES, help="interações por sessão")
+    parser.add_argument("--fonte", help="CSV local com os chamados (padrão: sintético)")
+    parser.add_argument("--linhas", type=int, default=100_000, help="tamanho do CSV sintético")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--pensar", type=float, default=0.0,
+                        help="pausa média (s) entre interações de uma sessão")
+    parser.add_argument("--timeout", type=float, default=300, help="limite (s) de cada rerun")
+    parser.add_argument("--saida", help="grava os resumos em JSON")
+    args = parser.parse_args()
+
+    # O app lê o CSS e a malha dos estados por caminho relativo à pasta dele
+    os.chdir(APP.parent)
+    with tempfile.TemporaryDirectory() as pasta:
+        # Antes de qualquer importação do app: dados.py lê a configuração ao ser importado
+        # (os processos das sessões herdam essas variáveis)
+        preparar_fonte(args.fonte, args.linhas, args.semente, pasta)
+        resumos = []
+        for sessoes in args.sessoes:
+            resumos.append(rodar_nivel(sessoes, args.acoes, args.semente, args.timeout,
+                                       args.pensar))
+            print(f"{sessoes} sessão(ões): p50 {resumos[-1].get('p50_ms')} ms, "
+                  f"{resumos[-1]['erros']} erro(s)", file=sys.stderr, flush=True)
+    imprimir(resumos)
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resumos, ensure_ascii=False, indent=2),
+                                    encoding="utf-8")
+    sys.exit(1 if any(r["erros"] for r in resumos) else 0)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+# Teto da chave inteira das células; se a próxima coluna passaria dele, as colunas já
+# combinadas são trocadas pela posição entre as combinações distintas (e a chave deixa
+# de valer para combinações que não estavam lá)
+LIMITE_CHAVE = 2 ** 62
+
+
+def _combinar(colunas, tamanhos):
+    # Chave int64 por linha que segue a ordem lexicográfica das colunas de códigos;
+    # também diz se ficou fixa (sem compactar), isto é, se serve para linhas futuras
+    chave = np.zeros(len(colunas[0]), dtype=np.int64)
+    limite, fixa = 1, True
+    for codigos, tamanho in zip(colunas, tamanhos):
+        if limite * tamanho >= LIMITE_CHAVE:
+            distintas, chave = np.unique(chave, return_inverse=True)
+            limite, fixa = len(distintas), False
+        chave = chave * tamanho + codigos
+        limite *= tamanho
+    return chave, fixa
+
+
+class Chaves:
+    """Chave int64 de cada célula (crescente, na mesma ordem das células) e a regra dela.
+
+    Dimensões categóricas entram pelo código; as inteiras (período, faixa), pela
+    distância ao mínimo, com folga para os próximos períodos. Com `delta`, a regra já
+    cobre as linhas dele (categorias novas entram em ordem, como no groupby) e
+    `delta_valores` guarda as chaves delas.
+    """
+
+    def __init__(self, celulas, colunas, delta=None):
+        self.colunas = list(colunas)
+        self.categorias, self.minimos, tamanhos, codigos = {}, {}, [], []
+        n = len(celulas)
+        for coluna in self.colunas:
+            if isinstance(celulas[coluna].dtype, pd.CategoricalDtype):
+                atuais = celulas[coluna].cat.categories
+                proprios = celulas[coluna].cat.codes.to_numpy().astype(np.int64)
+                categorias = atuais
+                if delta is not None:
+                    novas = pd.Index(delta[coluna].dropna().unique().tolist()).difference(atuais)
+                    if len(novas):
+                        categorias = atuais.append(novas).sort_values()
+                        proprios = categorias.get_indexer(atuais)[proprios]
+                    proprios = np.concatenate([proprios, pd.Categorical(
+                        delta[coluna], categories=categorias).codes.astype(np.int64)])
+                self.categorias[coluna] = categorias
+                codigos.append(proprios)
+                tamanhos.append(max(len(categorias), 1))
+            else:
+                valores = celulas[coluna].to_numpy().astype(np.int64)
+                if delta is not None:
+                    valores = np.concatenate([valores, delta[coluna].to_numpy().astype(np.int64)])
+                minimo, maximo = (valores.min(), valores.max()) if len(valores) else (0, 0)
+                self.minimos[coluna] = minimo
+                codigos.append(valores - minimo)
+                tamanhos.append(2 * int(maximo - minimo + 1))
+        self.tamanhos = tamanhos
+        valores, self.fixa = _combinar(codigos, tamanhos)
+        self.valores, self.delta_valores = valores[:n], valores[n:]
+
+    def codificar(self, delta):
+        """Chaves das linhas do delta pela mesma regra; None se alguma não cabe nela."""
+        if not self.fixa:
+            return None
+        codigos = []
+        for coluna, tamanho in zip(self.colunas, self.tamanhos):
+            if coluna in self.categorias:
+                valores = pd.Categorical(delta[coluna], categories=self.categorias[coluna])
+                valores = valores.codes.astype(np.int64)
+            else:
+                valores = delta[coluna].to_numpy().astype(np.int64) - self.minimos[coluna]
+            if len(valores) and (valores.min() < 0 or valores.max() >= tamanho):
+                return None
+            codigos.append(valores)
+        return _combinar(codigos, self.tamanhos)[0]
+
+    def com_valores(self, valores):
+        # Mesma regra, chaves de outro conjunto de células
+        novo = object.__new__(Chaves)
+        novo.__dict__.update(self.__dict__, valores=valores, delta_valores=None)
+        return novo
+
+
+def somar_celulas(celulas, delta, colunas, medidas, chaves=None):
+    """Soma às células as medidas do delta (com sinal; a mesma chave pode se repetir).
+
+    As células estão ordenadas pelas `colunas`, como saem do groupby, e `chaves` é a
+    chave de cada uma (montada aqui na primeira vez). Só as chaves do delta são
+    procuradas, por busca binária: as que já existem somam as medidas numa cópia das
+    colunas (a versão anterior continua intacta), as novas entram na posição delas e
+    as que ficaram com `n` zerado saem. Retorna as células, as chaves delas e se o
+    conjunto de células é o mesmo (mesmas posições e categorias), caso em que o
+    índice sobre elas continua valendo.
+    """
+    # Como no groupby, linhas com alguma coluna-chave vazia ficam de fora
+    delta = delta[delta[list(colunas)].notna().all(axis=1).to_numpy()]
+    if delta.empty:
+        return celulas, chaves, True
+    chave_delta = chaves.codificar(delta) if chaves is not None else None
+    if chave_delta is None:
+        # Primeira atualização, valor fora da regra (categoria nova, período além da
+        # folga) ou chave compactada: refaz as chaves de todas as células com o delta
+        chaves = Chaves(celulas, colunas, delta)
+        chave_delta = chaves.delta_valores
+    n = len(celulas)
+    unicas, primeiras, grupos = np.unique(chave_delta, return_index=True, return_inverse=True)
+    posicoes = np.searchsorted(chaves.valores, unicas)
+    existe = posicoes < n
+    existe[existe] = chaves.valores[posicoes[existe]] == unicas[existe]
+
+    atualizadas, somas = {}, {}
+    for medida in medidas:
+        valores = celulas[medida].to_numpy()
+        soma = np.zeros(len(unicas), dtype=valores.dtype)
+        np.add.at(soma, grupos, delta[medida].to_numpy())
+        valores = valores.copy()
+        valores[posicoes[existe]] += soma[existe]
+        atualizadas[medida], somas[medida] = valores, soma[~existe]
+    resultado = celulas.assign(**atualizadas)
+    novas_categorias = {c: v for c, v in chaves.categorias.items()
+                        if not v.equals(celulas[c].cat.categories)}
+    manter = resultado["n"].to_numpy() > 0
+    if existe.all() and manter.all() and not novas_categorias:
+        return resultado, chaves.com_valores(chaves.valores), True
+
+    for coluna, categorias in novas_categorias.items():
+        resultado[coluna] = resultado[coluna].cat.set_categories(categorias)
+    valores = chaves.valores
+    if not existe.all():
+        novas = delta.iloc[primeiras[~existe]][list(colunas)].reset_index(drop=True)
+        for coluna in chaves.categorias:
+            novas[coluna] = pd.Categorical(novas[coluna], categories=chaves.categorias[coluna])
+        novas = novas.assign(**somas)[list(resultado.columns)]
+        # Cada célula nova na posição da sua chave, como se tivesse saído do groupby
+        ordem = np.insert(np.arange(n), posicoes[~existe], n + np.arange(len(novas)))
+        manter = np.insert(manter, posicoes[~existe], somas["n"] > 0)
+        valores = np.insert(valores, posicoes[~existe], unicas[~existe])
+        resultado = pd.concat([resultado, novas], ignore_index=True)
+        ordem = ordem[manter]
+    else:
+        ordem = np.flatnonzero(manter)
+    resultado = resultado.iloc[ordem].reset_index(drop=True)
+    chaves = chaves.com_valores(valores[manter]) if chaves.fixa else None
+    return resultado, chaves, False
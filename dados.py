@@ -0,0 +1,700 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from agregados import CuboKPI
+from esbocos import QuantisKPI
+from indices import IndiceFiltros
+from instrumentacao import medir
+from series import SeriesTempo
+from termos import IndiceTermos
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Planilha publicada (CSV) com os chamados
+FONTE_PADRAO = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQAgKT04JKwpEfS-_TVFBUwWVhxSKJsZz7tgohIJ-0YCAqNhBMjkwgMjzxSUm8-eonbxYv6hGrbhE8X/pub?output=csv"
+
+# Configuração por variáveis de ambiente:
+#   DASH_FONTE_DADOS  -> URL ou caminho local de um CSV (substitui a planilha, útil em testes)
+#   DASH_CACHE_DIR    -> pasta do snapshot local
+#   DASH_SNAPSHOT_TTL -> segundos em que o snapshot é usado sem consultar a fonte
+#   DASH_COLUNA_CHAVE -> coluna que identifica o chamado (padrão: linha da planilha)
+#   DASH_BLOCO_LINHAS -> linhas do CSV convertidas por vez na ingestão
+FONTE_DADOS = os.environ.get("DASH_FONTE_DADOS", FONTE_PADRAO)
+DIR_CACHE = Path(os.environ.get("DASH_CACHE_DIR", ".cache_dados"))
+TTL_SNAPSHOT = int(os.environ.get("DASH_SNAPSHOT_TTL", "300"))
+COLUNA_CHAVE = os.environ.get("DASH_COLUNA_CHAVE", "")
+BLOCO_LINHAS = int(os.environ.get("DASH_BLOCO_LINHAS", "100000"))
+TIMEOUT_HTTP = 30
+# Tamanho dos pedaços lidos/baixados da fonte para calcular o hash e gravar o download
+BLOCO_BYTES = 1 << 20
+
+# Muda quando o formato do snapshot muda (colunas derivadas, tipos); força recarga completa
+ESQUEMA_SNAPSHOT = 5
+
+# Snapshot em Arrow IPC sem compressão: aberto por memory-map e compartilhado (via cache
+# de páginas do sistema) entre as sessões e os processos do servidor na mesma máquina
+ARQ_SNAPSHOT = "chamados.arrow"
+ARQ_META = "chamados.json"
+# Hash do conteúdo de cada linha da fonte (pela chave), para achar as que mudaram
+ARQ_HASHES = "hashes.parquet"
+# Linhas da fonte com problemas (descartadas ou com campo ignorado), com o motivo
+ARQ_QUARENTENA = "quarentena.csv"
+# Prefixo do download da fonte (URL), com nome único e apagado depois da ingestão
+PREFIXO_DOWNLOAD = "fonte."
+# Trava do download e da ingestão entre processos que usam a mesma pasta
+ARQ_TRAVA = "ingestao.lock"
+
+# Colunas que a planilha precisa ter; todas são lidas como texto e convertidas aqui,
+# nunca pelo tipo que o pandas adivinharia
+COLUNAS_FONTE = ["Abertura", "Loja", "Solicitante", "Status", "Analista", "NV. Prioridade",
+                 "SLA", "Setor", "Estado", "Assunto", "Solu. Prevista", "Solu. Real",
+                 "Atend. Real", "Encerramento", "Nota"]
+# Campos conferidos depois da conversão (coluna da fonte -> coluna convertida): um valor
+# preenchido que vira vazio vai para a quarentena e a linha segue com o campo vazio
+CONFERIDAS = {"Solu. Prevista": "Solu. Prevista", "Encerramento": "Encerramento",
+              "Solu. Real": "Solu. Real (dias)", "Atend. Real": "Atend. Real (dias)",
+              "Nota": "Nota"}
+
+# Colunas de dimensão (filtros e agrupamentos): guardadas como categóricas, com um
+# dicionário ordenado por coluna compartilhado por todas as linhas
+DIMENSOES = ["Month", "Loja", "Solicitante", "Status", "Analista",
+             "NV. Prioridade", "SLA", "Setor", "Estado"]
+# Dimensões que aparecem como filtros na barra lateral
+FILTROS = ["Month", "Loja", "Solicitante", "Status", "Analista",
+           "NV. Prioridade", "SLA", "Setor"]
+
+
+def _eh_url(fonte):
+    return str(fonte).startswith(("http://", "https://"))
+
+
+def _ler_meta(pasta):
+    caminho = pasta / ARQ_META
+    if not caminho.exists():
+        return None
+    try:
+        return json.loads(caminho.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _temporario(pasta, prefixo):
+    # Arquivo com nome único na pasta (mesmo sistema de arquivos, para o os.replace)
+    with tempfile.NamedTemporaryFile(dir=pasta, prefix=prefixo, suffix=".tmp",
+                                     delete=False) as arquivo:
+        return Path(arquivo.name)
+
+
+def _gravar_atomico(caminho, escrever):
+    # Grava em arquivo temporário e troca de uma vez, para nunca deixar snapshot pela metade;
+    # o nome único evita que dois processos gravem no mesmo temporário
+    tmp = _temporario(caminho.parent, caminho.name + ".")
+    try:
+        escrever(tmp)
+        os.replace(tmp, caminho)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def _travar(pasta):
+    """Trava exclusiva (flock) da pasta do snapshot durante o download e a ingestão."""
+    with open(pasta / ARQ_TRAVA, "a") as trava:
+        if fcntl is not None:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def gravar_arrow(df, caminho):
+    """Grava o quadro em Arrow IPC com colunas de largura fixa, prontas para memory-map.
+
+    Categóricas viram só os códigos (categorias nos metadados do campo), datas viram
+    int64 (NaT incluído) e lógicos viram uint8; assim nenhuma coluna numérica tem
+    máscara de nulos e todas podem ser lidas sem cópia. Textos ficam como strings Arrow.
+    """
+    nomes = ["__indice__"] + list(df.columns)
+    series = [df.index.to_series(index=None)] + [df[c] for c in df.columns]
+    campos, colunas = [], []
+    for nome, serie in zip(nomes, series):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tipo = {"tipo": "categoria", "categorias": serie.cat.categories.tolist()}
+            valores = pa.array(serie.cat.codes.to_numpy())
+        elif serie.dtype.kind == "M":
+            tipo = {"tipo": "data", "dtype": str(serie.dtype)}
+            valores = pa.array(serie.to_numpy().view(np.int64))
+        elif serie.dtype.kind == "b":
+            tipo = {"tipo": "logico"}
+            valores = pa.array(serie.to_numpy().view(np.uint8))
+        elif serie.dtype.kind in "iuf":
+            tipo = {"tipo": "numero"}
+            valores = pa.array(serie.to_numpy(), from_pandas=False)
+        else:
+            tipo = {"tipo": "texto"}
+            # Nulos continuam nulos (astype(str) os transformaria em "nan" no pandas < 3)
+            valores = pa.array(serie, from_pandas=True)
+        campos.append(pa.field(nome, valores.type, metadata={
+            "pandas": json.dumps(tipo, ensure_ascii=False, default=str)}))
+        colunas.append(valores)
+    esquema = pa.schema(campos, metadata={"indice": json.dumps(df.index.name)})
+    with pa.OSFile(str(caminho), "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, esquema) as escritor:
+            escritor.write_table(pa.Table.from_arrays(colunas, schema=esquema))
+
+
+def ler_arrow(caminho):
+    """Abre o snapshot por memory-map; as colunas são views somente leitura do arquivo.
+
+    Vários processos lendo o mesmo arquivo dividem as mesmas páginas de memória. Como
+    o snapshot é trocado com os.replace, quem já abriu a versão anterior continua
+    lendo o arquivo antigo até soltar a referência.
+    """
+    tabela = pa.ipc.open_file(pa.memory_map(str(caminho))).read_all()
+    colunas = {}
+    for campo, coluna in zip(tabela.schema, tabela.columns):
+        tipo = json.loads(campo.metadata[b"pandas"])
+        if tipo["tipo"] == "texto":
+            # O array, não a Series: uma Series (índice 0..n-1) seria alinhada pelo
+            # rótulo ao índice do snapshot, que não fica em ordem após uma mesclagem
+            colunas[campo.name] = coluna.to_pandas().array
+            continue
+        valores = (coluna.chunk(0).to_numpy(zero_copy_only=True) if coluna.num_chunks == 1
+                   else coluna.to_numpy())
+        if tipo["tipo"] == "categoria":
+            valores = pd.Categorical.from_codes(valores, categories=tipo["categorias"],
+                                                validate=False)
+        elif tipo["tipo"] == "data":
+            valores = valores.view(tipo["dtype"])
+        elif tipo["tipo"] == "logico":
+            valores = valores.view(bool)
+        colunas[campo.name] = valores
+    indice = pd.Index(colunas.pop("__indice__"),
+                      name=json.loads(tabela.schema.metadata[b"indice"]))
+    return pd.DataFrame(colunas, index=indice, copy=False)
+
+
+def _gravar_meta(pasta, meta):
+    _gravar_atomico(pasta / ARQ_META, lambda p: p.write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"))
+
+
+def _hash_arquivo(caminho):
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for parte in iter(lambda: arquivo.read(BLOCO_BYTES), b""):
+            resumo.update(parte)
+    return resumo.hexdigest()
+
+
+def _baixar(fonte, meta, pasta):
+    """Busca a fonte de forma condicional, sem carregá-la inteira na memória.
+
+    Retorna (arquivo, versão, validadores); arquivo é None quando a fonte não mudou.
+    URLs são baixadas em pedaços para um arquivo na pasta do snapshot; arquivos locais
+    são lidos no lugar. A versão é o SHA-256 do conteúdo.
+    """
+    meta = meta or {}
+    if _eh_url(fonte):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        with requests.get(fonte, headers=headers, timeout=TIMEOUT_HTTP, stream=True) as resp:
+            if resp.status_code == 304:
+                return None, None, {}
+            resp.raise_for_status()
+            arquivo = _temporario(pasta, PREFIXO_DOWNLOAD)
+            resumo = hashlib.sha256()
+            try:
+                with open(arquivo, "wb") as destino:
+                    for parte in resp.iter_content(BLOCO_BYTES):
+                        resumo.update(parte)
+                        destino.write(parte)
+            except BaseException:
+                arquivo.unlink(missing_ok=True)
+                raise
+            validadores = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+        return arquivo, resumo.hexdigest(), validadores
+
+    caminho = Path(str(fonte).removeprefix("file://"))
+    stat = caminho.stat()
+    if meta.get("mtime") == stat.st_mtime_ns and meta.get("tamanho") == stat.st_size:
+        return None, None, {}
+    return caminho, _hash_arquivo(caminho), {"mtime": stat.st_mtime_ns, "tamanho": stat.st_size}
+
+
+def _colunas_fonte(arquivo):
+    """Colunas do CSV (só o cabeçalho); erro se faltar alguma das esperadas."""
+    colunas = list(pd.read_csv(arquivo, nrows=0).columns)
+    faltando = [c for c in COLUNAS_FONTE if c not in colunas]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na fonte: {', '.join(faltando)}")
+    return colunas
+
+
+def _ler_blocos(arquivo, linhas=None):
+    """Lê o CSV em blocos de `linhas`, tudo como texto; a chave de cada chamado é o índice."""
+    leitor = pd.read_csv(arquivo, dtype=str, chunksize=linhas or BLOCO_LINHAS)
+    vazio = True
+    for bloco in leitor:
+        vazio = False
+        # Chave de cada chamado: a coluna configurada ou a linha da planilha (o índice
+        # dos blocos continua a contagem do anterior)
+        if COLUNA_CHAVE and COLUNA_CHAVE in bloco.columns:
+            bloco.index = pd.Index(bloco[COLUNA_CHAVE].to_numpy())
+        yield bloco
+    if vazio:
+        yield pd.read_csv(arquivo, dtype=str, nrows=0)
+
+
+def converter_para_dias(coluna):
+    return (
+        coluna.astype(str)
+              .str.lower()
+              .str.replace("h", "", regex=False)
+              .str.replace(",", ".", regex=False)
+              .str.extract(r"([\d\.]+)", expand=False)
+              .astype(float) / 24
+    )
+
+
+def _data(coluna):
+    # Converte só os valores distintos (datas e textos se repetem muito) e espalha pelos códigos
+    codigos, distintos = pd.factorize(coluna)
+    convertidos = pd.to_datetime(pd.Series(distintos, dtype=object), dayfirst=True, errors="coerce")
+    valores = np.append(convertidos.to_numpy(), np.datetime64("NaT"))
+    return pd.Series(valores[codigos], index=coluna.index)
+
+
+def _mes(datas):
+    # "AAAA-MM" como categórica, calculado sobre datetime64[M] em vez de formatar linha a linha
+    meses = datas.to_numpy().astype("datetime64[M]")
+    validos = ~np.isnat(meses)
+    categorias = np.unique(meses[validos])
+    codigos = np.full(len(meses), -1, dtype=np.int32)
+    codigos[validos] = np.searchsorted(categorias, meses[validos])
+    return pd.Series(pd.Categorical.from_codes(
+        codigos, categories=np.datetime_as_string(categorias, unit="M")), index=datas.index)
+
+
+DIAS_SEMANA = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Colunas derivadas, calculadas uma única vez na carga (na ordem abaixo) e gravadas
+# no snapshot; a cada interação o app só recorta. "Solu. Real" tem dois usos: como
+# texto em horas ("12,5h") dá os dias de solução e, lida como data, é comparada com
+# a Solu. Prevista para o SLA.
+DERIVACOES = [
+    ("Month", lambda d: _mes(d["Abertura"])),
+    ("Solu. Real (dias)", lambda d: converter_para_dias(d["Solu. Real"])),
+    ("Atend. Real (dias)", lambda d: converter_para_dias(d["Atend. Real"])),
+    ("Solu. Prevista", lambda d: _data(d["Solu. Prevista"])),
+    ("Solu. Real (data)", lambda d: _data(d["Solu. Real"])),
+    ("SLA Cumprido", lambda d: d["Solu. Real (data)"] <= d["Solu. Prevista"]),
+    ("Encerramento", lambda d: _data(d["Encerramento"])),
+    ("Mês Encerramento", lambda d: _mes(d["Encerramento"])),
+    ("Dia da Semana", lambda d: pd.Series(pd.Categorical.from_codes(
+        d["Abertura"].dt.dayofweek, categories=DIAS_SEMANA), index=d.index)),
+    ("Hora", lambda d: d["Abertura"].dt.hour.astype("int8")),
+]
+
+
+def preparar_dados(bruto):
+    df_loaded = bruto.copy()
+    df_loaded["Abertura"] = _data(df_loaded["Abertura"])
+    df_loaded = df_loaded.dropna(subset=["Abertura"])
+    df_loaded = df_loaded.sort_values("Abertura", kind="stable")
+    for coluna, derivar in DERIVACOES:
+        with medir(f"derivar: {coluna}", entrada=len(df_loaded)):
+            df_loaded[coluna] = derivar(df_loaded)
+    return compactar(df_loaded)
+
+
+def compactar(df_loaded):
+    # Dimensões em códigos inteiros + dicionário; Nota reduzida para float32
+    for coluna in DIMENSOES:
+        if coluna in df_loaded.columns and not isinstance(df_loaded[coluna].dtype, pd.CategoricalDtype):
+            categorias = sorted(df_loaded[coluna].dropna().unique())
+            df_loaded[coluna] = pd.Categorical(df_loaded[coluna], categories=categorias)
+    if "Nota" in df_loaded.columns:
+        df_loaded["Nota"] = pd.to_numeric(
+            df_loaded["Nota"], errors="coerce").astype("float32")
+    return df_loaded
+
+
+def opcoes_dimensao(df, coluna):
+    # Valores possíveis de um filtro, direto do dicionário da dimensão
+    return list(df[coluna].cat.categories)
+
+
+def _unir_categorias(base, novos):
+    # Mesmo dicionário nos dois lados, para o concat manter as colunas categóricas
+    for coluna in base.columns:
+        if isinstance(base[coluna].dtype, pd.CategoricalDtype):
+            if base[coluna].cat.categories.equals(novos[coluna].cat.categories):
+                continue
+            categorias = sorted(set(base[coluna].cat.categories)
+                                | set(novos[coluna].cat.categories))
+            base[coluna] = base[coluna].cat.set_categories(categorias)
+            novos[coluna] = novos[coluna].cat.set_categories(categorias)
+
+
+def _hash_linhas(bruto):
+    return pd.util.hash_pandas_object(bruto, index=False)
+
+
+def _juntar(blocos):
+    # Um quadro só a partir dos blocos convertidos: mesmo dicionário em todas as
+    # categóricas (a união dos blocos) e ordem por Abertura
+    if len(blocos) == 1:
+        return blocos[0]
+    for coluna in blocos[0].columns:
+        if not isinstance(blocos[0][coluna].dtype, pd.CategoricalDtype):
+            continue
+        categorias = blocos[0][coluna].cat.categories
+        if all(b[coluna].cat.categories.equals(categorias) for b in blocos[1:]):
+            continue
+        categorias = sorted(set().union(*(b[coluna].cat.categories for b in blocos)))
+        for bloco in blocos:
+            bloco[coluna] = bloco[coluna].cat.set_categories(categorias)
+    df = pd.concat(blocos)
+    if not df["Abertura"].is_monotonic_increasing:
+        df = df.sort_values("Abertura", kind="stable")
+    return df
+
+
+def _problemas(bruto, preparados):
+    """Linhas do bloco com problema e o motivo, para a quarentena.
+
+    Sem Abertura válida a linha é descartada (não entra nos indicadores); nos campos
+    de `CONFERIDAS`, um valor preenchido que não pôde ser convertido é lido como vazio.
+    Os dois quadros são comparados pelo índice, que precisa ser único (a posição no bloco).
+    """
+    motivos = []
+    descartadas = bruto.loc[bruto.index.difference(preparados.index), "Abertura"]
+    motivos.append(pd.Series(np.where(descartadas.isna(), "Abertura vazia (linha descartada)",
+                                      "Abertura inválida (linha descartada)"),
+                             index=descartadas.index, dtype=object))
+    for origem, convertida in CONFERIDAS.items():
+        valores = bruto.loc[preparados.index, origem]
+        invalidos = valores.notna().to_numpy() & preparados[convertida].isna().to_numpy()
+        if invalidos.any():
+            motivos.append(pd.Series(f"{origem}: valor inválido (lido como vazio)",
+                                     index=valores.index[invalidos], dtype=object))
+    motivos = pd.concat(motivos)
+    if motivos.empty:
+        # Quadro novo (não uma fatia do bloco, que manteria o bloco inteiro na memória)
+        return pd.DataFrame(columns=[*bruto.columns, "motivo"], dtype=str)
+    motivos = motivos.groupby(level=0).agg("; ".join)
+    return bruto.loc[motivos.index].assign(motivo=motivos)
+
+
+def _ler_quarentena(pasta):
+    caminho = pasta / ARQ_QUARENTENA
+    if not caminho.exists():
+        return None
+    quarentena = pd.read_csv(caminho, dtype=str, index_col=0)
+    if not COLUNA_CHAVE:
+        quarentena.index = quarentena.index.astype(np.int64)
+    return quarentena
+
+
+def _mesclar_ordenado(base, novos):
+    # Insere as linhas novas mantendo a ordem por Abertura, sem reordenar o histórico
+    if base.empty:
+        return novos
+    if novos.empty:
+        return base
+    _unir_categorias(base, novos)
+    if novos["Abertura"].iloc[0] >= base["Abertura"].iloc[-1]:
+        return pd.concat([base, novos])
+    pos = base["Abertura"].searchsorted(novos["Abertura"], side="right")
+    ordem = np.insert(np.arange(len(base)), pos, len(base) + np.arange(len(novos)))
+    return pd.concat([base, novos]).iloc[ordem]
+
+
+def _converter_blocos(arquivo, selecionar=None):
+    """Converte a fonte bloco a bloco; só os blocos já compactados ficam na memória.
+
+    `selecionar(hashes)` recebe o hash das linhas do bloco e devolve a máscara das que
+    precisam ser convertidas (todas, se None). Retorna um dicionário com as linhas
+    convertidas, o hash de todas as linhas, a quarentena, as chaves convertidas e se
+    as chaves são únicas.
+    """
+    preparados, todos_hashes, quarentena, selecionadas = [], [], [], []
+    for bloco in _ler_blocos(arquivo):
+        hashes = _hash_linhas(bloco)
+        todos_hashes.append(hashes)
+        if selecionar is not None:
+            bloco = bloco[selecionar(hashes)]
+        # Conversão e quarentena alinhadas pela posição da linha no bloco, única mesmo
+        # com a coluna-chave repetida; as chaves voltam para o índice depois
+        chaves = bloco.index
+        bloco = bloco.set_axis(pd.RangeIndex(len(bloco)))
+        convertidos = preparar_dados(bloco)
+        problemas = _problemas(bloco, convertidos)
+        preparados.append(convertidos.set_axis(chaves[convertidos.index]))
+        quarentena.append(problemas.set_axis(chaves[problemas.index]))
+        selecionadas.append(chaves)
+    hashes = pd.concat(todos_hashes)
+    return {
+        "df": _juntar(preparados),
+        "hashes": hashes,
+        "quarentena": pd.concat(quarentena),
+        "chaves": selecionadas[0].append(selecionadas[1:]),
+        "unicas": hashes.index.is_unique,
+    }
+
+
+def _selecao_incremental(hashes_antes):
+    # Linhas com chave nova ou com conteúdo diferente do da última ingestão. Com a
+    # chave padrão (número da linha), uma linha apagada no meio desloca as seguintes,
+    # que mudam de conteúdo e são reconvertidas
+    valores_antes = hashes_antes.to_numpy()
+
+    def selecionar(hashes):
+        posicoes = hashes_antes.index.get_indexer(hashes.index)
+        conhecidas = posicoes >= 0
+        mudou = ~conhecidas
+        mudou[conhecidas] = valores_antes[posicoes[conhecidas]] != hashes.to_numpy()[conhecidas]
+        return mudou
+
+    return selecionar
+
+
+def _ingerir(arquivo, pasta, meta):
+    """Converte o CSV em blocos, reaproveitando o snapshot anterior quando possível.
+
+    Toda linha da fonte tem o hash do seu conteúdo guardado pela chave; só são
+    convertidas as linhas com chave nova ou hash diferente, e as chaves que sumiram da
+    fonte saem do snapshot. As convertidas são intercaladas no histórico já ordenado
+    (anexadas direto quando passam da marca d'água de Abertura). A fonte é lida em
+    blocos de BLOCO_LINHAS linhas, com o esquema explícito (tudo texto, convertido
+    aqui), e só os blocos convertidos e compactados se acumulam: o pico de memória
+    acompanha o quadro final e um bloco, não o CSV inteiro em texto. Retorna o quadro
+    final, o hash de cada linha, a quarentena (linhas com problemas e motivo), os
+    metadados da ingestão e o delta (linhas removidas, linhas adicionadas) usado para
+    atualizar os agregados; o delta é None numa carga completa.
+    """
+    colunas = _colunas_fonte(arquivo)
+    arq_hashes = pasta / ARQ_HASHES
+    anterior = None
+    if meta is not None and arq_hashes.exists() and meta.get("colunas") == colunas:
+        hashes_antes = pd.read_parquet(arq_hashes)["hash"]
+        # Só vale com chaves únicas, antes e agora; senão, carga completa
+        if hashes_antes.index.is_unique:
+            lidos = _converter_blocos(arquivo, _selecao_incremental(hashes_antes))
+            if lidos["unicas"]:
+                anterior = ler_arrow(pasta / ARQ_SNAPSHOT)
+
+    if anterior is not None:
+        preparados = lidos["df"]
+        # Linhas reconvertidas e linhas que saíram da fonte
+        chaves = lidos["chaves"].union(hashes_antes.index.difference(lidos["hashes"].index))
+        removidas = anterior.loc[anterior.index.intersection(chaves)]
+        base = anterior.drop(index=removidas.index)
+        df_loaded = _mesclar_ordenado(base, preparados)
+        for coluna in DIMENSOES:
+            if coluna in df_loaded.columns and isinstance(df_loaded[coluna].dtype, pd.CategoricalDtype):
+                df_loaded[coluna] = df_loaded[coluna].cat.remove_unused_categories()
+        # Problemas das linhas não relidas continuam na quarentena
+        quarentena = _ler_quarentena(pasta)
+        if quarentena is not None:
+            quarentena = pd.concat([
+                quarentena.drop(index=quarentena.index.intersection(chaves)),
+                lidos["quarentena"]])
+        else:
+            quarentena = lidos["quarentena"]
+        delta = (removidas, preparados)
+    else:
+        lidos = _converter_blocos(arquivo)
+        df_loaded = lidos["df"]
+        quarentena = lidos["quarentena"]
+        delta = None
+
+    if len(quarentena):
+        logger.warning("%d linha(s) da fonte com problemas; detalhes em %s",
+                       len(quarentena), pasta / ARQ_QUARENTENA)
+    info = {
+        "colunas": colunas,
+        "linhas_fonte": len(lidos["hashes"]),
+        "quarentena": len(quarentena),
+        "marca_dagua": df_loaded["Abertura"].max().isoformat() if len(df_loaded) else None,
+    }
+    return df_loaded, lidos["hashes"].rename("hash").to_frame(), quarentena, info, delta
+
+
+class Dataset:
+    """Uma versão dos chamados e as estruturas derivadas dela.
+
+    Somente leitura: é compartilhada entre as sessões. As estruturas auxiliares são
+    construídas na primeira vez em que são usadas e valem para toda a versão.
+    """
+
+    def __init__(self, df, versao, anterior=None, delta=None):
+        self.df = df
+        self.versao = versao
+        # Versão anterior + linhas que mudaram: permite atualizar os agregados
+        # incrementalmente em vez de recalculá-los do zero
+        self._anterior = anterior
+        self._delta = delta
+
+    def _incremental(self, nome):
+        # Estrutura equivalente da versão anterior, se ela já tiver sido construída
+        if self._anterior is None or self._delta is None:
+            return None
+        return self._anterior.__dict__.get(nome)
+
+    def soltar_anterior(self):
+        """Solta a versão anterior (e o mmap dela) e o delta.
+
+        Chamado depois que cubo, séries e quantis desta versão foram construídos: daí em
+        diante nada mais é atualizado a partir deles.
+        """
+        self._anterior = self._delta = None
+
+    @cached_property
+    def indice(self):
+        return IndiceFiltros(self.df, FILTROS)
+
+    @cached_property
+    def cubo(self):
+        anterior = self._incremental("cubo")
+        if anterior is not None:
+            return anterior.atualizar(*self._delta)
+        return CuboKPI.de_linhas(self.df, FILTROS)
+
+    @cached_property
+    def series(self):
+        anterior = self._incremental("series")
+        if anterior is not None:
+            return anterior.atualizar(*self._delta, self.df)
+        return SeriesTempo(self.df, FILTROS)
+
+    @cached_property
+    def quantis(self):
+        anterior = self._incremental("quantis")
+        if anterior is not None:
+            return anterior.atualizar(*self._delta, self.df, self.indice)
+        return QuantisKPI(self.df, FILTROS, self.indice)
+
+    @cached_property
+    def termos(self):
+        return IndiceTermos(self.df["Assunto"])
+
+
+_ultimo_dataset = None
+
+
+def _dataset(versao, ler, versao_base=None, delta=None):
+    # Reaproveita o Dataset (e seus índices) enquanto a versão não mudar
+    global _ultimo_dataset
+    if _ultimo_dataset is None or _ultimo_dataset.versao != versao:
+        anterior = _ultimo_dataset
+        if anterior is not None and anterior.versao != versao_base:
+            anterior = None
+        _ultimo_dataset = Dataset(ler(), versao, anterior, delta)
+        if anterior is not None:
+            # Só a versão imediatamente anterior é mantida como base
+            anterior._anterior = anterior._delta = None
+    return _ultimo_dataset
+
+
+def carregar_dados(fonte=None, ttl=None, pasta=None):
+    """Carrega os chamados (como `Dataset`) a partir do snapshot local, revalidando a fonte após o TTL.
+
+    O snapshot fica em Arrow IPC (aberto por memory-map) com os tipos já convertidos; enquanto estiver dentro do
+    TTL nenhuma requisição é feita. Depois disso a fonte é consultada com ETag /
+    Last-Modified (ou mtime para arquivos locais) e, se o conteúdo vier igual (mesmo
+    hash), o snapshot é só revalidado. Quando muda, a ingestão é incremental (ver
+    `_ingerir`). Download e ingestão acontecem sob uma trava da pasta, para que
+    processos que compartilham o cache não gravem o snapshot ao mesmo tempo.
+    """
+    fonte = fonte or FONTE_DADOS
+    ttl = TTL_SNAPSHOT if ttl is None else ttl
+    pasta = Path(pasta or DIR_CACHE)
+    pasta.mkdir(parents=True, exist_ok=True)
+    arq_snapshot = pasta / ARQ_SNAPSHOT
+
+    def ler_snapshot():
+        return ler_arrow(arq_snapshot)
+
+    def meta_valida():
+        meta = _ler_meta(pasta)
+        if meta is not None and (meta.get("fonte") != fonte
+                                 or meta.get("esquema") != ESQUEMA_SNAPSHOT
+                                 or not arq_snapshot.exists()):
+            return None
+        return meta
+
+    meta = meta_valida()
+    if meta is not None and time.time() - meta["validado_em"] < ttl:
+        return _dataset(meta["versao"], ler_snapshot)
+
+    with _travar(pasta):
+        # Outro processo pode ter revalidado (ou reingerido) enquanto este esperava a trava
+        meta = meta_valida()
+        if meta is not None and time.time() - meta["validado_em"] < ttl:
+            return _dataset(meta["versao"], ler_snapshot)
+        return _atualizar(fonte, meta, pasta, ler_snapshot)
+
+
+def _atualizar(fonte, meta, pasta, ler_snapshot):
+    # Consulta a fonte e reingere se mudou; chamada com a trava da pasta
+    try:
+        arquivo, versao, validadores = _baixar(fonte, meta, pasta)
+    except (requests.RequestException, OSError):
+        # Sem acesso à fonte: segue com o último snapshot, se houver
+        if meta is not None:
+            return _dataset(meta["versao"], ler_snapshot)
+        raise
+
+    ingerido = False
+    if arquivo is not None:
+        try:
+            if meta is None or meta.get("versao") != versao:
+                versao_base = meta and meta.get("versao")
+                df_loaded, hashes, quarentena, info, delta = _ingerir(arquivo, pasta, meta)
+                _gravar_atomico(pasta / ARQ_SNAPSHOT, lambda p: gravar_arrow(df_loaded, p))
+                _gravar_atomico(pasta / ARQ_HASHES, lambda p: hashes.to_parquet(p))
+                _gravar_atomico(pasta / ARQ_QUARENTENA,
+                                lambda p: quarentena.to_csv(p, index_label="chave"))
+                meta = {"fonte": fonte, "versao": versao, "esquema": ESQUEMA_SNAPSHOT, **info}
+                # A cópia da ingestão sai da memória antes de abrir o snapshot
+                del df_loaded, hashes, quarentena
+                ingerido = True
+        finally:
+            if _eh_url(fonte):
+                arquivo.unlink(missing_ok=True)
+        meta.update(validadores)
+
+    meta["validado_em"] = time.time()
+    _gravar_meta(pasta, meta)
+    if ingerido:
+        # A versão publicada é a do arquivo (memory-map), não a cópia em memória da ingestão
+        return _dataset(meta["versao"], ler_snapshot, versao_base, delta)
+    return _dataset(meta["versao"], ler_snapshot)
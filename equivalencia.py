@@ -0,0 +1,305 @@
+"""Confere se os caminhos otimizados dão o mesmo resultado que o cálculo direto.
+
+Uso:
+    python equivalencia.py --fonte chamados.csv            # todas as verificações
+    python equivalencia.py --fonte chamados.csv --verificacoes incremental --sorteios 50
+
+A fonte precisa ser um CSV local: as verificações gravam versões modificadas dele e
+snapshots em pastas temporárias, sem tocar no cache do app.
+
+    incremental -> ingestão incremental depois de excluir, editar e incluir linhas na
+                   fonte x recarga completa da mesma fonte (quadro, quarentena, KPIs,
+                   percentis e séries de tempo dos agregados atualizados)
+    indice      -> índice de bitmaps (posições, contagem, máscara e a busca por assunto
+                   combinada) x máscaras booleanas do pandas, com e sem período
+    cubo        -> KPIs do cubo e percentis dos histogramas x os mesmos valores
+                   calculados das linhas filtradas
+    blocos      -> ingestão em vários blocos x o arquivo inteiro num bloco só, com
+                   linhas inválidas e uma categoria que só aparece no último bloco
+                   (quadro, tipos, quarentena e hashes das linhas)
+    chaves      -> coluna-chave (DASH_COLUNA_CHAVE) com uma chave repetida numa linha
+                   inválida: as duas ingestões terminam em carga completa, iguais a
+                   uma carga do zero (quadro, quarentena, KPIs, percentis e séries)
+
+Termina com código 1 se houver qualquer diferença.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import dados
+from agregados import agregar, kpis
+from atualizador import aquecer
+from dados import FILTROS, _ler_quarentena, carregar_dados, opcoes_dimensao
+from esbocos import percentis_linhas
+from paridade import _diferenca, sortear_selecoes
+from series import EVENTOS, GRAOS
+
+
+def _carregar(fonte, pasta):
+    # Carga isolada: sem reaproveitar o Dataset de outra pasta
+    dados._ultimo_dataset = None
+    return carregar_dados(str(fonte), ttl=0, pasta=pasta)
+
+
+def _comparar_quadros(esperado, obtido):
+    # Mesmas linhas (pela chave), mesmas colunas e mesmos valores
+    if not esperado.index.sort_values().equals(obtido.index.sort_values()):
+        return f"chaves diferentes ({len(esperado)} x {len(obtido)} linhas)"
+    return _diferenca(esperado.sort_index(), obtido.sort_index())
+
+
+def _comparar_agregados(esperado, obtido, sorteios, semente):
+    # KPIs do cubo, percentis dos histogramas e séries de tempo (todo evento e grão)
+    # para os mesmos filtros sorteados
+    for selecoes in sortear_selecoes(esperado.df, sorteios, semente):
+        consultas = [("kpis", lambda d: d.cubo.kpis(selecoes)),
+                     ("percentis", lambda d: d.quantis.percentis(selecoes))]
+        consultas += [(f"série {evento}/{grao}",
+                       lambda d, evento=evento, grao=grao: d.series.serie(evento, grao, selecoes))
+                      for evento in EVENTOS for grao in GRAOS]
+        for nome, consulta in consultas:
+            diferenca = _diferenca(consulta(esperado), consulta(obtido))
+            if diferenca:
+                ativos = {c: v for c, v in selecoes.items() if v is not None}
+                return f"{nome} {ativos}: {diferenca}"
+    return None
+
+
+def _editar_fonte(texto):
+    # Nova versão da fonte: exclui uma linha do meio (com a chave padrão, desloca as
+    # seguintes), edita a nota de uma linha antiga, apaga a loja de outra (dimensão
+    # vazia fica fora dos agregados) e inclui uma no fim
+    n = len(texto)
+    texto = texto.drop(index=texto.index[n // 2]).reset_index(drop=True)
+    linha = n // 4
+    texto.loc[linha, "Nota"] = "1" if texto.loc[linha, "Nota"] != "1" else "5"
+    texto.loc[n // 5, "Loja"] = ""
+    return pd.concat([texto, texto.iloc[[0]]], ignore_index=True)
+
+
+def verificar_incremental(fonte, pasta, sorteios=30, semente=0):
+    """Ingestão incremental de uma fonte editada x recarga completa; retorna as diferenças."""
+    texto = pd.read_csv(fonte, dtype=str, keep_default_na=False)
+    arquivo = pasta / "fonte.csv"
+    texto.to_csv(arquivo, index=False)
+    # Agregados construídos antes da mudança, como no atualizador, mais as séries que o
+    # aquecimento não monta, para que todos sejam atualizados pelo delta
+    anterior = aquecer(_carregar(arquivo, pasta / "incremental"))
+    for evento in EVENTOS:
+        for grao in GRAOS:
+            anterior.series.serie(evento, grao)
+
+    _editar_fonte(texto).to_csv(arquivo, index=False)
+    incremental = carregar_dados(str(arquivo), ttl=0, pasta=pasta / "incremental")
+    completo = _carregar(arquivo, pasta / "completo")
+
+    diferencas = []
+    if incremental._delta is None:
+        diferencas.append("a segunda carga não foi incremental")
+    if not incremental.df["Abertura"].is_monotonic_increasing:
+        diferencas.append("quadro incremental fora da ordem de Abertura")
+    for nome, diferenca in [
+        ("quadro", _comparar_quadros(completo.df, incremental.df)),
+        ("quarentena", _comparar_quadros(_ler_quarentena(pasta / "completo"),
+                                         _ler_quarentena(pasta / "incremental"))),
+        ("agregados", _comparar_agregados(completo, incremental, sorteios, semente)),
+    ]:
+        if diferenca:
+            diferencas.append(f"{nome}: {diferenca}")
+    return diferencas
+
+
+def _mascara_filtros(df, selecoes, periodo):
+    # Filtro direto do pandas; "todos" ainda exclui linhas com a dimensão vazia
+    mascara = df[FILTROS].notna().all(axis=1).to_numpy()
+    for coluna, valores in selecoes.items():
+        if valores is not None:
+            mascara = mascara & df[coluna].isin(valores).to_numpy()
+    if periodo is not None:
+        abertura = df["Abertura"]
+        mascara = mascara & ((abertura >= periodo[0]) & (abertura <= periodo[1])).to_numpy()
+    return mascara
+
+
+def verificar_indice(fonte, pasta, sorteios=30, semente=0):
+    """Índice de bitmaps x máscaras booleanas, com e sem período; retorna as diferenças."""
+    dataset = _carregar(fonte, pasta)
+    df = dataset.df
+    inicio, fim = df["Abertura"].quantile(0.3), df["Abertura"].quantile(0.6)
+    # Sem período, um período no meio dos dados e um vazio (início depois do fim)
+    periodos = [None, (inicio, fim), (fim, inicio)]
+    palavra = df["Assunto"].dropna().iloc[0].split()[0]
+    por_assunto = dataset.termos.buscar(palavra)
+    amostra = np.sort(np.random.default_rng(semente).choice(
+        len(df), min(len(df), 1000), replace=False))
+
+    diferencas = []
+    for selecoes in sortear_selecoes(df, sorteios, semente):
+        for periodo in periodos:
+            mascara = _mascara_filtros(df, selecoes, periodo)
+            esperado = np.flatnonzero(mascara)
+            selecao = dataset.indice.selecionar(selecoes, periodo)
+            for nome, igual in [
+                ("posições", np.array_equal(selecao.posicoes, esperado)),
+                ("contagem", len(selecao) == len(esperado)),
+                ("máscara", np.array_equal(selecao.mascara, mascara)),
+                ("pertence", np.array_equal(selecao.contem(amostra), mascara[amostra])),
+                (f"assunto {palavra!r}", np.array_equal(
+                    selecao.restringir(por_assunto).posicoes,
+                    np.intersect1d(esperado, por_assunto))),
+            ]:
+                if not igual:
+                    ativos = {c: v for c, v in selecoes.items() if v is not None}
+                    diferencas.append(f"{nome} {ativos} período={periodo}")
+    return diferencas
+
+
+def verificar_cubo(fonte, pasta, sorteios=30, semente=0):
+    """KPIs do cubo e dos histogramas x calculados das linhas; retorna as diferenças."""
+    dataset = _carregar(fonte, pasta)
+    df = dataset.df
+    # Além dos sorteios (quase sempre com várias dimensões), uma dimensão por vez, com e
+    # sem mês: são as consultas respondidas pelo cuboide reduzido e pelos histogramas
+    mes = list(opcoes_dimensao(df, "Month")[-1:])
+    unicas = [{c: list(opcoes_dimensao(df, c)[:2]) if c == coluna else None for c in FILTROS}
+              for coluna in FILTROS]
+    unicas += [{**s, "Month": mes} for s in unicas if s["Month"] is None]
+    diferencas = []
+    for selecoes in sortear_selecoes(df, sorteios, semente) + unicas:
+        linhas = df.iloc[np.flatnonzero(_mascara_filtros(df, selecoes, None))]
+        for nome, esperado, obtido in [
+            ("kpis", kpis(agregar(linhas, FILTROS)), dataset.cubo.kpis(selecoes)),
+            ("percentis", percentis_linhas(linhas), dataset.quantis.percentis(selecoes)),
+        ]:
+            diferenca = _diferenca(esperado, obtido)
+            if diferenca:
+                ativos = {c: v for c, v in selecoes.items() if v is not None}
+                diferencas.append(f"{nome} {ativos}: {diferenca}")
+    return diferencas
+
+
+def _estragar_fonte(texto):
+    # Problemas espalhados pelos blocos: linha descartada, campos ignorados e uma loja
+    # nova só na última linha (as categorias dos blocos precisam ser unidas)
+    texto = texto.copy()
+    n = len(texto)
+    texto.loc[n // 3, "Abertura"] = "data inválida"
+    texto.loc[n // 2, "Nota"] = "nota inválida"
+    texto.loc[2 * n // 3, "Solu. Real"] = "??"
+    texto.loc[n - 1, "Loja"] = "Loja Nova"
+    return texto
+
+
+def verificar_blocos(fonte, pasta, sorteios=30, semente=0):
+    """Ingestão em blocos x arquivo inteiro num bloco; retorna as diferenças."""
+    texto = _estragar_fonte(pd.read_csv(fonte, dtype=str, keep_default_na=False))
+    arquivo = pasta / "fonte.csv"
+    texto.to_csv(arquivo, index=False)
+    bloco_linhas = dados.BLOCO_LINHAS
+    try:
+        # Blocos que não dividem a fonte por igual (o último fica menor)
+        dados.BLOCO_LINHAS = max(1, len(texto) // 7)
+        em_blocos = _carregar(arquivo, pasta / "blocos")
+        dados.BLOCO_LINHAS = len(texto) + 1
+        inteiro = _carregar(arquivo, pasta / "inteiro")
+    finally:
+        dados.BLOCO_LINHAS = bloco_linhas
+
+    diferencas = []
+    tipos = [str(t) for t in inteiro.df.dtypes], [str(t) for t in em_blocos.df.dtypes]
+    if tipos[0] != tipos[1]:
+        diferencas.append(f"tipos: {tipos[0]} x {tipos[1]}")
+    for nome, esperado, obtido in [
+        ("quadro", inteiro.df, em_blocos.df),
+        ("quarentena", _ler_quarentena(pasta / "inteiro"), _ler_quarentena(pasta / "blocos")),
+        ("hashes", pd.read_parquet(pasta / "inteiro" / dados.ARQ_HASHES),
+         pd.read_parquet(pasta / "blocos" / dados.ARQ_HASHES)),
+    ]:
+        diferenca = _comparar_quadros(esperado, obtido)
+        if diferenca:
+            diferencas.append(f"{nome}: {diferenca}")
+    if not len(_ler_quarentena(pasta / "inteiro")):
+        diferencas.append("quarentena vazia: as linhas inválidas não foram detectadas")
+    return diferencas
+
+
+def _repetir_chave(texto):
+    # Coluna-chave com a chave da primeira linha repetida numa linha do meio, que também
+    # tem um campo inválido (a repetida vai para a quarentena)
+    texto = texto.copy()
+    texto.insert(0, "Chamado", [f"CH{i:08d}" for i in range(len(texto))])
+    texto.loc[2 * len(texto) // 3, "Chamado"] = texto.loc[0, "Chamado"]
+    return texto
+
+
+def verificar_chaves(fonte, pasta, sorteios=30, semente=0):
+    """Chave repetida: ingestões sem erro e iguais a uma carga do zero; retorna as diferenças."""
+    texto = _repetir_chave(_estragar_fonte(pd.read_csv(fonte, dtype=str, keep_default_na=False)))
+    arquivo = pasta / "fonte.csv"
+    texto.to_csv(arquivo, index=False)
+    coluna_chave = dados.COLUNA_CHAVE
+    try:
+        dados.COLUNA_CHAVE = "Chamado"
+        primeira = aquecer(_carregar(arquivo, pasta / "chaves"))
+        _editar_fonte(texto).to_csv(arquivo, index=False)
+        segunda = carregar_dados(str(arquivo), ttl=0, pasta=pasta / "chaves")
+        completo = _carregar(arquivo, pasta / "completo")
+        # A quarentena só é lida com as chaves como texto enquanto a coluna estiver ativa
+        quarentenas = _ler_quarentena(pasta / "completo"), _ler_quarentena(pasta / "chaves")
+    finally:
+        dados.COLUNA_CHAVE = coluna_chave
+
+    diferencas = []
+    repetida = texto.loc[0, "Chamado"]
+    if (primeira.df.index == repetida).sum() != 2:
+        diferencas.append(f"a chave repetida {repetida} não aparece duas vezes no quadro")
+    if segunda._delta is not None:
+        diferencas.append("a segunda carga foi incremental com chaves repetidas")
+    for nome, diferenca in [
+        ("quadro", _comparar_quadros(completo.df, segunda.df)),
+        ("quarentena", _comparar_quadros(*quarentenas)),
+        ("agregados", _comparar_agregados(completo, segunda, sorteios, semente)),
+    ]:
+        if diferenca:
+            diferencas.append(f"{nome}: {diferenca}")
+    if repetida not in quarentenas[1].index:
+        diferencas.append(f"a linha inválida com a chave repetida {repetida} não está na quarentena")
+    return diferencas
+
+
+VERIFICACOES = {
+    "incremental": verificar_incremental,
+    "indice": verificar_indice,
+    "cubo": verificar_cubo,
+    "blocos": verificar_blocos,
+    "chaves": verificar_chaves,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fonte", default=dados.FONTE_DADOS,
+                        help="CSV local (padrão: DASH_FONTE_DADOS)")
+    parser.add_argument("--verificacoes", nargs="+", choices=list(VERIFICACOES),
+                        default=list(VERIFICACOES))
+    parser.add_argument("--sorteios", type=int, default=30)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+    if dados._eh_url(args.fonte):
+        sys.exit("A fonte precisa ser um CSV local (--fonte).")
+
+    total = 0
+    for nome in args.verificacoes:
+        with tempfile.TemporaryDirectory() as pasta:
+            diferencas = VERIFICACOES[nome](Path(args.fonte), Path(pasta), args.sorteios,
+                                            args.semente)
+        for diferenca in diferencas[:20]:
+            print(f"[{nome}] {diferenca}")
+        print(f"{nome}: {len(diferencas)} diferença(s)")
+        total += len(diferencas)
+    sys.exit(1 if total else 0)
@@ -0,0 +1,182 @@
+"""Esboços de quantis para os percentis de resolução e atendimento dos KPIs.
+
+Cada valor cai numa faixa logarítmica: a faixa i > 0 cobre (MINIMO·γ^(i-1), MINIMO·γ^i],
+com γ = (1 + ALFA) / (1 - ALFA), e o valor representativo dela fica a no máximo ALFA
+(erro relativo) de qualquer valor da faixa; a faixa 0 junta os valores até MINIMO.
+As contagens por faixa são aditivas, como as medidas do cubo: histogramas de células
+diferentes se juntam somando e uma ingestão incremental subtrai as linhas antigas e
+soma as novas (t-digest e KLL juntam, mas não sabem remover).
+"""
+import numpy as np
+import pandas as pd
+
+from celulas import somar_celulas
+from indices import IndiceFiltros
+
+# Erro relativo máximo dos percentis e menor valor (em dias) com faixa própria
+ALFA = 0.01
+GAMA = (1 + ALFA) / (1 - ALFA)
+MINIMO = 1e-3
+# Colunas com percentis nos KPIs (nome -> coluna) e percentis calculados
+COLUNAS_QUANTIS = {"resolucao": "Solu. Real (dias)", "atendimento": "Atend. Real (dias)"}
+PERCENTIS = (50, 90, 99)
+# Dimensão de tempo presente em todos os histogramas
+TEMPO = "Month"
+
+
+def faixas(serie):
+    """Faixa de cada valor da série; -1 para valores vazios."""
+    valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+    resultado = np.full(len(valores), -1, dtype=np.int16)
+    validos = ~np.isnan(valores)
+    resultado[validos] = np.ceil(
+        np.log(np.maximum(valores[validos], MINIMO) / MINIMO) / np.log(GAMA))
+    return resultado
+
+
+def valor_faixa(codigos):
+    # Representante da faixa: equidistante (em erro relativo) dos dois limites
+    codigos = np.asarray(codigos, dtype="float64")
+    return np.where(codigos > 0, MINIMO * 2 * GAMA ** codigos / (GAMA + 1), 0.0)
+
+
+def quantis(contagens, percentis=PERCENTIS):
+    """Percentis a partir das contagens por faixa (posição no array = faixa)."""
+    total = contagens.sum()
+    if not total:
+        return {p: np.nan for p in percentis}
+    acumulado = np.cumsum(contagens)
+    # Posição do percentil entre os valores ordenados (a mais baixa, sem interpolar)
+    posicoes = np.floor(np.asarray(percentis) / 100 * (total - 1))
+    return dict(zip(percentis, valor_faixa(np.searchsorted(acumulado, posicoes, side="right"))))
+
+
+def percentis_linhas(df):
+    """Percentis das linhas de `df`, para filtros fora dos histogramas (período, assunto)."""
+    resultado = {}
+    for nome, coluna in COLUNAS_QUANTIS.items():
+        codigos = faixas(df[coluna])
+        resultado[f"percentis_{nome}"] = quantis(np.bincount(codigos[codigos >= 0]))
+    return resultado
+
+
+def linhas_faixas(df, coluna, grao, dimensoes, sinal=1):
+    # Uma linha por valor: dimensões do grão, faixa e n = sinal
+    codigos = faixas(df[coluna])
+    validas = (codigos >= 0) & df[list(dimensoes)].notna().all(axis=1).to_numpy()
+    contagem = df.loc[validas, list(grao)].copy()
+    contagem["Faixa"] = codigos[validas]
+    contagem["n"] = sinal
+    return contagem
+
+
+def contar_faixas(df, coluna, grao, dimensoes):
+    """Quantidade de valores por faixa e combinação das dimensões do grão.
+
+    Entram só as linhas com todas as `dimensoes` preenchidas, as mesmas que o índice
+    de filtros (e o cubo) consideram quando um filtro está em "todos".
+    """
+    return linhas_faixas(df, coluna, grao, dimensoes).groupby(
+        list(grao) + ["Faixa"], observed=True)["n"].sum().reset_index()
+
+
+class Histograma:
+    """Contagens por faixa de uma coluna, por combinação das dimensões de um grão."""
+
+    def __init__(self, celulas, coluna, grao, dimensoes, indice=None, chaves=None):
+        self.coluna = coluna
+        self.grao = list(grao)
+        self.dimensoes = list(dimensoes)
+        self.celulas = celulas
+        self.indice = indice or IndiceFiltros(celulas, self.grao, coluna_tempo=None)
+        # Chave de cada célula (celulas.Chaves), montada na primeira atualização
+        self._chaves = chaves
+
+    @classmethod
+    def de_linhas(cls, df, coluna, grao, dimensoes):
+        return cls(contar_faixas(df, coluna, grao, dimensoes), coluna, grao, dimensoes)
+
+    def atualizar(self, removidas, adicionadas):
+        # Faixas das linhas que mudaram (a versão antiga com sinal trocado) somadas só
+        # nas células delas; o índice é reaproveitado se nenhuma célula entrou ou saiu
+        delta = pd.concat([
+            linhas_faixas(removidas, self.coluna, self.grao, self.dimensoes, sinal=-1),
+            linhas_faixas(adicionadas, self.coluna, self.grao, self.dimensoes)],
+            ignore_index=True)
+        celulas, chaves, mesmas = somar_celulas(
+            self.celulas, delta, self.grao + ["Faixa"], ["n"], self._chaves)
+        return Histograma(celulas, self.coluna, self.grao, self.dimensoes,
+                          self.indice if mesmas else None, chaves)
+
+    def contagens(self, selecoes):
+        celulas = self.celulas.iloc[self.indice.filtrar(selecoes)]
+        return np.bincount(celulas["Faixa"].to_numpy(), weights=celulas["n"].to_numpy())
+
+
+class QuantisKPI:
+    """Percentis (p50, p90, p99) de resolução e atendimento para os cards de KPI.
+
+    Guarda histogramas em faixas por mês e por mês × cada dimensão de filtro fora de
+    `opcionais`, montados de uma vez por `construir` (no aquecimento da versão) ou, se
+    faltarem, na primeira consulta que precisa deles. Uma consulta com
+    no máximo uma dimensão filtrada além do mês soma as faixas das células que passam
+    no filtro, com custo que não cresce com o histórico; as demais contam as faixas
+    das linhas filtradas pelo índice.
+    """
+
+    def __init__(self, df, dimensoes, indice, opcionais=("Solicitante",), histogramas=None):
+        self.df = df
+        self.dimensoes = list(dimensoes)
+        self.indice = indice
+        self.opcionais = tuple(opcionais)
+        self.histogramas = dict(histogramas or {})
+        self._faixas = {}
+
+    def _grao(self, ativos):
+        # Menor grão que cobre os filtros ativos (None: nenhum, vai pelas linhas)
+        extras = [c for c in ativos if c != TEMPO]
+        if len(extras) > 1 or any(c in self.opcionais for c in extras):
+            return None
+        return (TEMPO, *extras)
+
+    def _histograma(self, coluna, grao):
+        if (coluna, grao) not in self.histogramas:
+            self.histogramas[(coluna, grao)] = Histograma.de_linhas(
+                self.df, coluna, grao, self.dimensoes)
+        return self.histogramas[(coluna, grao)]
+
+    def _faixas_linhas(self, coluna):
+        if coluna not in self._faixas:
+            self._faixas[coluna] = faixas(self.df[coluna])
+        return self._faixas[coluna]
+
+    def _contagens_linhas(self, coluna, ativos):
+        codigos = self._faixas_linhas(coluna)[self.indice.filtrar(ativos)]
+        return np.bincount(codigos[codigos >= 0])
+
+    def construir(self):
+        """Monta todos os histogramas e as faixas das linhas, para nenhuma consulta esperar."""
+        graos = [(TEMPO,)] + [(TEMPO, c) for c in self.dimensoes
+                              if c != TEMPO and c not in self.opcionais]
+        for coluna in COLUNAS_QUANTIS.values():
+            for grao in graos:
+                self._histograma(coluna, grao)
+            self._faixas_linhas(coluna)
+        return self
+
+    def atualizar(self, removidas, adicionadas, df, indice):
+        histogramas = {chave: h.atualizar(removidas, adicionadas)
+                       for chave, h in self.histogramas.items()}
+        return QuantisKPI(df, self.dimensoes, indice, self.opcionais, histogramas)
+
+    def percentis(self, selecoes):
+        ativos = {c: v for c, v in selecoes.items() if v is not None}
+        grao = self._grao(ativos)
+        resultado = {}
+        for nome, coluna in COLUNAS_QUANTIS.items():
+            if grao is None:
+                contagens = self._contagens_linhas(coluna, ativos)
+            else:
+                contagens = self._histograma(coluna, grao).contagens(ativos)
+            resultado[f"percentis_{nome}"] = quantis(contagens)
+        return resultado
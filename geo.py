@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import time
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Fonte original da malha dos estados; só é acessada para gerar o arquivo local, fora
+# das requisições (`preparar_geojson` no atualizador e no lote, ou `python geo.py`)
+GEOJSON_URL = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+# Malha já simplificada, versionada junto com o app ou gerada por `preparar_geojson`
+# (carregada uma vez por processo)
+ARQ_GEOJSON = Path("assecs") / "brazil-states.geojson"
+TIMEOUT_HTTP = 10
+
+# Tolerância da simplificação em graus (~1 km) e casas decimais mantidas nas coordenadas
+TOLERANCIA = 0.01
+CASAS = 4
+
+UFS = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia",
+    "CE": "Ceará", "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás",
+    "MA": "Maranhão", "MT": "Mato Grosso", "MS": "Mato Grosso do Sul",
+    "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
+    "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro",
+    "RN": "Rio Grande do Norte", "RS": "Rio Grande do Sul", "RO": "Rondônia",
+    "RR": "Roraima", "SC": "Santa Catarina", "SP": "São Paulo", "SE": "Sergipe",
+    "TO": "Tocantins",
+}
+# Grafias que aparecem na planilha e não batem com a malha
+APELIDOS = {"Tocatins": "Tocantins"}
+
+
+def _chave_nome(nome):
+    # Comparação sem acento, caixa ou espaços extras
+    nome = unicodedata.normalize("NFKD", str(nome).strip().lower())
+    return "".join(c for c in nome if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=1)
+def tabela_estados():
+    """Tabela nome normalizado -> nome do estado na malha (inclui siglas e apelidos)."""
+    tabela = {}
+    for sigla, nome in UFS.items():
+        tabela[_chave_nome(sigla)] = nome
+        tabela[_chave_nome(nome)] = nome
+    for apelido, nome in APELIDOS.items():
+        tabela[_chave_nome(apelido)] = nome
+    return tabela
+
+
+def nome_estado(nome):
+    return tabela_estados().get(_chave_nome(nome), str(nome).strip())
+
+
+# Simplificação
+# Cada anel é quebrado nos pontos de junção (onde muda o conjunto de estados que
+# compartilham o vértice) e cada trecho é simplificado com Douglas-Peucker. Como
+# vizinhos quebram a divisa nos mesmos pontos, os dois lados ficam idênticos e a
+# malha não abre buracos nem sobreposições.
+
+def _distancia(p, a, b):
+    (x, y), (x1, y1), (x2, y2) = p, a, b
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return ((x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2) ** 0.5
+
+
+def _douglas_peucker(pontos, tolerancia):
+    manter = [False] * len(pontos)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        ini, fim = pilha.pop()
+        maior, idx = 0.0, None
+        for i in range(ini + 1, fim):
+            d = _distancia(pontos[i], pontos[ini], pontos[fim])
+            if d > maior:
+                maior, idx = d, i
+        if idx is not None and maior > tolerancia:
+            manter[idx] = True
+            pilha += [(ini, idx), (idx, fim)]
+    return [p for p, m in zip(pontos, manter) if m]
+
+
+def _aneis(geometria):
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    return geometria["coordinates"]
+
+
+def simplificar_geojson(geojson, tolerancia=TOLERANCIA, casas=CASAS):
+    """Reduz os vértices da malha preservando as divisas compartilhadas.
+
+    Os nomes dos estados já saem padronizados por `nome_estado`.
+    """
+    features = geojson["features"]
+    quantizar = lambda p: (round(p[0], casas), round(p[1], casas))  # noqa: E731
+
+    donos = {}
+    for i, feature in enumerate(features):
+        for poligono in _aneis(feature["geometry"]):
+            for anel in poligono:
+                for p in anel:
+                    donos.setdefault(quantizar(p), set()).add(i)
+
+    def simplificar_anel(anel):
+        pontos = [quantizar(p) for p in anel]
+        pontos = [p for j, p in enumerate(pontos) if j == 0 or p != pontos[j - 1]]
+        if len(pontos) < 4:
+            return [list(p) for p in pontos]
+        n = len(pontos) - 1  # o último repete o primeiro
+        juncoes = [j for j in range(n)
+                   if donos[pontos[j]] != donos[pontos[j - 1 if j else n - 1]]
+                   or donos[pontos[j]] != donos[pontos[j + 1]]]
+        if not juncoes:
+            # Anel sem vizinhos (ilha): três cortes fixos para não virar um segmento
+            juncoes = [0, n // 3, 2 * n // 3]
+        # Gira o anel para começar numa junção e simplifica trecho a trecho
+        inicio = juncoes[0]
+        pontos = pontos[inicio:n] + pontos[:inicio] + [pontos[inicio]]
+        cortes = sorted({(j - inicio) % n for j in juncoes} | {n})
+        resultado = [pontos[0]]
+        for a, b in zip(cortes[:-1], cortes[1:]):
+            resultado += _douglas_peucker(pontos[a:b + 1], tolerancia)[1:]
+        if len(resultado) < 4:
+            resultado = pontos
+        return [list(p) for p in resultado]
+
+    saida = {"type": "FeatureCollection", "features": []}
+    for feature in features:
+        geometria = feature["geometry"]
+        poligonos = [[simplificar_anel(anel) for anel in poligono]
+                     for poligono in _aneis(geometria)]
+        saida["features"].append({
+            "type": "Feature",
+            "properties": {"name": nome_estado(feature["properties"]["name"])},
+            "geometry": {
+                "type": geometria["type"],
+                "coordinates": poligonos[0] if geometria["type"] == "Polygon" else poligonos,
+            },
+        })
+    return saida
+
+
+def baixar_geojson(url=GEOJSON_URL):
+    resp = requests.get(url, timeout=TIMEOUT_HTTP)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _gravar(geojson, caminho):
+    # Grava num temporário ao lado e troca de uma vez: quem ler no meio não vê meio arquivo
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    temporario.write_text(json.dumps(geojson, ensure_ascii=False, separators=(",", ":")),
+                          encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+def preparar_geojson(caminho=ARQ_GEOJSON, url=GEOJSON_URL):
+    """Garante o arquivo local da malha: se ainda não existir, baixa, simplifica e grava.
+
+    Roda fora das requisições (thread do atualizador, aquecimento do lote). Sem rede ou
+    sem permissão de escrita, só avisa no log e retorna False; o mapa segue omitido.
+    """
+    caminho = Path(caminho)
+    if caminho.exists():
+        return True
+    try:
+        _gravar(simplificar_geojson(baixar_geojson(url)), caminho)
+    except (requests.RequestException, OSError, ValueError) as erro:
+        logger.warning("Não foi possível gerar a malha dos estados em %s: %s", caminho, erro)
+        return False
+    logger.info("Malha dos estados gerada em %s", caminho)
+    # Uma leitura anterior pode ter guardado None: a próxima passa a ler o arquivo novo
+    carregar_geojson.cache_clear()
+    return True
+
+
+@lru_cache(maxsize=1)
+def carregar_geojson(caminho=ARQ_GEOJSON):
+    """Malha dos estados, lida do arquivo local uma vez por processo.
+
+    Nunca acessa a rede: sem o arquivo (gerado por `preparar_geojson` ou `python geo.py`),
+    avisa no log e retorna None, que fica em cache até a malha ser gerada, e o mapa é omitido.
+    """
+    try:
+        return json.loads(Path(caminho).read_text(encoding="utf-8"))
+    except OSError as erro:
+        logger.warning("Malha dos estados indisponível (%s); o mapa não será exibido "
+                       "até a malha ser gerada.", erro)
+        return None
+
+
+def _medir(geojson, repeticoes=5):
+    # Tamanho do JSON da figura enviada ao navegador e tempo para gerá-la
+    import plotly.express as px
+
+    nomes = [f["properties"]["name"] for f in geojson["features"]]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        fig = px.choropleth(
+            {"Estado": nomes, "Chamados": list(range(len(nomes)))},
+            geojson=geojson, locations="Estado", featureidkey="properties.name",
+            color="Chamados", scope="south america")
+        fig.update_geos(fitbounds="locations", visible=False)
+        payload = fig.to_json()
+    return len(payload.encode("utf-8")), (time.perf_counter() - inicio) / repeticoes
+
+
+if __name__ == "__main__":
+    # Gera (ou regenera) o arquivo local e compara a malha original com a simplificada:
+    #   python geo.py
+    original = baixar_geojson()
+    simplificada = simplificar_geojson(original)
+    _gravar(simplificada, ARQ_GEOJSON)
+    vertices = lambda g: sum(len(a) for f in g["features"]  # noqa: E731
+                             for p in _aneis(f["geometry"]) for a in p)
+    for rotulo, geojson in [("original", original), ("simplificada", simplificada)]:
+        tamanho, tempo = _medir(geojson)
+        print(f"{rotulo:>12}: {vertices(geojson):>7} vértices | "
+              f"figura {tamanho / 1024:8.1f} KiB | to_json {tempo * 1000:7.1f} ms")
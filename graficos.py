@@ -0,0 +1,623 @@
+import io
+import multiprocessing
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dados import DIAS_SEMANA
+from geo import carregar_geojson, nome_estado
+from instrumentacao import medir
+from motores import obter_motor
+from series import SeriesTempo
+
+# Cores base do CSS (copiadas de :root)
+PRIMARY_COLOR = "#004D7F"        # --primary-color
+ACCENT_COLOR = "#007BFF"         # --accent-color
+TEXT_COLOR = "#2F3645"           # --text-color
+LIGHT_TEXT_COLOR = "#555A68"     # --light-text-color
+CARD_BACKGROUND = "#FFFFFF"      # --card-background
+BACKGROUND_COLOR = "#E6EEF5"     # --background-color
+BORDER_COLOR = "#CDD5DB"         # --border-color
+SHADOW_COLOR = "rgba(0, 0, 0, 0.15)"  # --shadow-color
+
+# Máximo de pontos individuais por analista no box plot de avaliações
+MAX_PONTOS_BOX = 50
+
+
+def aplicar_tema_padrao(fig, titulo=None):
+    fig.update_layout(
+        title=titulo,
+        plot_bgcolor=BACKGROUND_COLOR,
+        paper_bgcolor=CARD_BACKGROUND,
+        font_color=TEXT_COLOR,
+        title_font_color=PRIMARY_COLOR,
+        xaxis_title_font_color=TEXT_COLOR,
+        yaxis_title_font_color=TEXT_COLOR,
+        legend_title_font=dict(size=14, family="Segoe UI", color=TEXT_COLOR),
+        legend_font=dict(size=12, family="Segoe UI", color=LIGHT_TEXT_COLOR),
+        legend_bgcolor='rgba(0,0,0,0)',
+        hovermode="x unified",
+        autosize=True,
+        margin=dict(l=40, r=40, t=50, b=80),
+        font=dict(family="Segoe UI", size=12, color=TEXT_COLOR),
+        transition=dict(duration=500, easing='cubic-in-out')
+    )
+    fig.update_xaxes(
+        tickangle=45,
+        showgrid=True,
+        gridcolor=BORDER_COLOR,
+        tickfont_color=TEXT_COLOR
+    )
+    fig.update_yaxes(
+        showgrid=True,
+        gridcolor=BORDER_COLOR,
+        tickfont_color=TEXT_COLOR
+    )
+    return fig
+
+
+def _anotar(fig, texto):
+    fig.add_annotation(
+        text=texto,
+        xref="paper", yref="paper",
+        x=0.5, y=1.12, showarrow=False,
+        font=dict(size=14, color=PRIMARY_COLOR))
+    return fig
+
+
+# ============================
+# Dados dos gráficos
+# ============================
+# Cada gráfico recebe só o agregado de que precisa, calculado aqui com
+# pandas/NumPy; o tamanho da figura enviada ao navegador não cresce com o histórico.
+
+def contagem(df, coluna, nome="Chamados", motor=None):
+    # Contagem por categoria (maiores primeiro), sem as categorias que não aparecem no recorte
+    contagens = (motor or obter_motor()).agrupar(df, [coluna], {nome: ("contar", None)})
+    return contagens.sort_values(nome, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def dados_abertos_por_dia(series, selecoes=None):
+    por_dia = series.serie("abertura", "dia", selecoes)
+    return pd.DataFrame({"Dia": por_dia.index, "Chamados": por_dia.to_numpy()})
+
+
+def dados_encerrados_por_mes(series, selecoes=None):
+    por_mes = series.serie("encerramento", "mes", selecoes).sort_index()
+    df_mes = pd.DataFrame({
+        "Month": np.datetime_as_string(por_mes.index.to_numpy(), unit="M"),
+        "Chamados": por_mes.to_numpy(),
+    })
+    total_chamados = df_mes["Chamados"].sum()
+    df_mes["Porcentagem"] = (df_mes["Chamados"] /
+                             total_chamados * 100).round(1)
+    df_mes["Rótulo"] = df_mes["Chamados"].astype(
+        str) + " chamados - " + df_mes["Porcentagem"].astype(str) + "%"
+    return df_mes
+
+
+def dados_top_solicitantes(df, n=10, motor=None):
+    top_solicitantes = contagem(df, "Solicitante", "Total", motor).head(n)
+    top_solicitantes["Solicitante"] = top_solicitantes["Solicitante"].astype(str)
+    return top_solicitantes
+
+
+def dados_heatmap(series, selecoes=None):
+    # Grade 7 x 24 (dia da semana x hora) a partir do agregado por hora da semana
+    por_hora = series.serie("abertura", "hora_semana", selecoes)
+    grade = np.bincount(por_hora.index.to_numpy(), weights=por_hora.to_numpy(),
+                        minlength=7 * 24).astype(np.int64)
+    return pd.DataFrame({
+        "Dia da Semana": np.repeat(DIAS_SEMANA, 24),
+        "Hora": np.tile(np.arange(24), 7),
+        "Chamados": grade,
+    })
+
+
+def dados_estados(df, motor=None):
+    contagem_estado = contagem(df, "Estado", motor=motor)
+    chamados_estado = contagem_estado.groupby(
+        contagem_estado["Estado"].astype(str).map(nome_estado))["Chamados"].sum().reset_index()
+    chamados_estado.columns = ["Estado", "Chamados"]
+    return chamados_estado
+
+
+def dados_media_atendimento_analista(df, motor=None):
+    return (motor or obter_motor()).agrupar(
+        df, ["Analista"], {"Atend. Real (dias)": ("media", "Atend. Real (dias)")}
+    ).sort_values("Atend. Real (dias)", ascending=False)
+
+
+def dados_media_por(df, campo, motor=None):
+    medias = (motor or obter_motor()).agrupar(df, [campo], {
+        "Atend. Real (dias)": ("media", "Atend. Real (dias)"),
+        "Solu. Real (dias)": ("media", "Solu. Real (dias)"),
+    }).dropna().reset_index(drop=True)
+    medias["Média Geral"] = medias[["Atend. Real (dias)", "Solu. Real (dias)"]].mean(axis=1)
+    return medias.sort_values("Média Geral", ascending=False)
+
+
+def dados_box_notas(df, max_pontos=MAX_PONTOS_BOX):
+    """Quartis e bigodes das notas por analista, mais uma amostra limitada dos pontos.
+
+    Os bigodes seguem a regra do plotly (extremos dentro de 1,5 IQR). Os pontos
+    fora dos bigodes entram primeiro na amostra; o restante é completado com uma
+    amostra determinística dos demais, até `max_pontos` por analista.
+    """
+    notas = df.dropna(subset=["Nota"])[["Analista", "Nota"]]
+    estatisticas, pontos = [], []
+    for analista, grupo in notas.groupby("Analista", observed=True)["Nota"]:
+        valores = np.sort(grupo.to_numpy(dtype=float))
+        q1, mediana, q3 = np.quantile(valores, [0.25, 0.5, 0.75], method="linear")
+        iqr = q3 - q1
+        dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+        estatisticas.append({
+            "Analista": str(analista), "q1": q1, "mediana": mediana, "q3": q3,
+            "min": dentro.min(), "max": dentro.max(),
+        })
+        fora = valores[(valores < dentro.min()) | (valores > dentro.max())]
+        resto = valores[(valores >= dentro.min()) & (valores <= dentro.max())]
+        amostra = fora[:max_pontos]
+        if len(amostra) < max_pontos and len(resto):
+            passo = max(1, len(resto) // (max_pontos - len(amostra)))
+            amostra = np.concatenate([amostra, resto[::passo][:max_pontos - len(amostra)]])
+        pontos.append(pd.DataFrame({"Analista": str(analista), "Nota": amostra}))
+    estatisticas = pd.DataFrame(estatisticas, columns=["Analista", "q1", "mediana", "q3", "min", "max"])
+    pontos = pd.concat(pontos, ignore_index=True) if pontos else pd.DataFrame(columns=["Analista", "Nota"])
+    return estatisticas, pontos
+
+
+def dados_qtd_avaliacoes(df, motor=None):
+    qtd = (motor or obter_motor()).agrupar(
+        df, ["Analista"], {"Quantidade de Avaliações": ("contar", "Nota")})
+    qtd = qtd[qtd["Quantidade de Avaliações"] > 0]
+    return qtd.sort_values("Quantidade de Avaliações", ascending=False)
+
+
+def dados_media_nota_por(df, campo, motor=None):
+    medias = (motor or obter_motor()).agrupar(df, [campo], {"Nota": ("media", "Nota")})
+    return medias.dropna().sort_values("Nota", ascending=False)
+
+
+# ============================
+# Figuras
+# ============================
+
+def fig_abertos_por_dia(por_dia, media_diaria):
+    fig6 = px.line(
+        por_dia,
+        x="Dia",
+        y="Chamados",
+        color_discrete_sequence=[PRIMARY_COLOR]
+    )
+    _anotar(fig6, f"Média diária: {media_diaria:.1f} chamados")
+    return aplicar_tema_padrao(fig6, "Chamados Abertos por Dia")
+
+
+def fig_encerrados_por_mes(df_mes):
+    fig = px.bar(
+        df_mes,
+        x="Month",
+        y="Chamados",
+        text="Rótulo",
+        labels={"Month": "Mês", "Chamados": "Encerrados"},
+        color_discrete_sequence=["#004D7F"]
+    )
+    media_mensal = df_mes["Chamados"].mean()
+    _anotar(fig, f"Média mensal: {media_mensal:.1f} encerramentos")
+    fig.update_traces(textposition="outside")
+    return aplicar_tema_padrao(
+        fig, "Chamados Encerrados por Mês com Porcentagem")
+
+
+def fig_status(por_status):
+    fig5 = px.pie(
+        por_status,
+        names="Status",
+        values="Chamados",
+        hole=0.4,
+        color_discrete_sequence=[PRIMARY_COLOR]
+    )
+    return aplicar_tema_padrao(fig5, "Distribuição por Status")
+
+
+def fig_sla(por_sla):
+    fig = px.bar(
+        por_sla,
+        x="SLA",
+        y="Chamados",
+        text_auto=True,
+        labels={"Chamados": "count"},
+        color_discrete_sequence=[PRIMARY_COLOR, ACCENT_COLOR]
+    )
+    if len(por_sla):
+        sla_moda = por_sla.sort_values(["Chamados", "SLA"], ascending=[False, True])["SLA"].iloc[0]
+        _anotar(fig, f"SLA mais comum: {sla_moda}")
+    return aplicar_tema_padrao(fig, "Distribuição de SLA dos Chamados")
+
+
+def fig_prioridade(por_prioridade):
+    fig_prioridade = px.pie(
+        por_prioridade,
+        names="NV. Prioridade",
+        values="Chamados",
+        hole=0.4,
+        color_discrete_sequence=[PRIMARY_COLOR, ACCENT_COLOR],
+    )
+    return aplicar_tema_padrao(
+        fig_prioridade, "Percentual por Prioridade")
+
+
+def fig_top_solicitantes(top_solicitantes):
+    fig0 = px.bar(
+        top_solicitantes, x="Solicitante", y="Total",
+        text="Total",
+        color_discrete_sequence=[PRIMARY_COLOR, ACCENT_COLOR]
+    )
+    return aplicar_tema_padrao(fig0, "👥 Top 10 Solicitantes com Mais Chamados")
+
+
+def fig_heatmap(grade):
+    fig_heatmap = px.density_heatmap(
+        grade,
+        x="Hora",
+        y="Dia da Semana",
+        z="Chamados",
+        histfunc="sum",
+        color_continuous_scale="blues"
+    )
+    fig_heatmap.update_traces(xbins=dict(start=-0.5, end=23.5, size=1))
+    por_hora = grade.groupby("Hora")["Chamados"].sum()
+    if por_hora.sum() > 0:
+        _anotar(fig_heatmap, f"Horário de pico: {por_hora.idxmax()}h")
+    return aplicar_tema_padrao(
+        fig_heatmap, "Horários de Pico de chamados")
+
+
+def fig_estados(chamados_estado, geojson_data):
+    fig6 = px.choropleth(
+        chamados_estado,
+        geojson=geojson_data,
+        locations="Estado",
+        featureidkey="properties.name",
+        color="Chamados",
+        color_continuous_scale=["#A0C4FF", "#007BFF", "#004D7F"],
+        scope="south america"
+    )
+    fig6.update_geos(fitbounds="locations", visible=False)
+    return aplicar_tema_padrao(
+        fig6, "Distribuição de Chamados por Estado (Brasil)")
+
+
+def fig_media_atendimento_analista(media_analista):
+    fig2 = px.bar(
+        media_analista,
+        x="Analista",
+        y="Atend. Real (dias)",
+        text_auto=".2f",
+        labels={"Atend. Real (dias)": "Média de Atendimento (dias)"},
+        color_discrete_sequence=[PRIMARY_COLOR, ACCENT_COLOR]
+    )
+    return aplicar_tema_padrao(fig2, "Tempo Médio de Atendimento por Analista")
+
+
+def fig_media_por(medias, campo, titulo):
+    fig8 = px.bar(
+        medias,
+        x=campo,
+        y=["Atend. Real (dias)", "Solu. Real (dias)"],
+        barmode="group",
+        text_auto=".1f",
+        labels={"value": "Dias", campo: campo},
+        color_discrete_sequence=["#004D7F", "#007BFF"]
+    )
+    media_geral = medias["Média Geral"].mean()
+    _anotar(fig8, f"Média geral: {media_geral:.1f} dias")
+    return aplicar_tema_padrao(fig8, titulo)
+
+
+def fig_box_notas(estatisticas, pontos, media_geral_nota):
+    # Caixas a partir dos quartis já calculados + amostra limitada de pontos
+    fig_avaliacao = go.Figure()
+    fig_avaliacao.add_trace(go.Box(
+        x=estatisticas["Analista"],
+        q1=estatisticas["q1"],
+        median=estatisticas["mediana"],
+        q3=estatisticas["q3"],
+        lowerfence=estatisticas["min"],
+        upperfence=estatisticas["max"],
+        name="Nota",
+        marker_color=PRIMARY_COLOR,
+        boxpoints=False,
+    ))
+    fig_avaliacao.add_trace(go.Scatter(
+        x=pontos["Analista"],
+        y=pontos["Nota"],
+        mode="markers",
+        name="Avaliações",
+        marker=dict(color=PRIMARY_COLOR, size=5, opacity=0.5),
+    ))
+    fig_avaliacao.update_layout(
+        showlegend=False,
+        xaxis_title="Analista",
+        yaxis_title="Avaliação (1 a 5)",
+    )
+    _anotar(fig_avaliacao, f"Média geral: {media_geral_nota:.1f}")
+    return aplicar_tema_padrao(
+        fig_avaliacao, "Avaliações por Analista")
+
+
+def fig_qtd_avaliacoes(avaliacoes_por_analista):
+    fig_qtd_avaliacoes = px.bar(
+        avaliacoes_por_analista,
+        x="Analista",
+        y="Quantidade de Avaliações",
+        text="Quantidade de Avaliações",
+        color_discrete_sequence=[PRIMARY_COLOR],
+    )
+    return aplicar_tema_padrao(
+        fig_qtd_avaliacoes, "⭐Avaliações Recebidas por Analista")
+
+
+def fig_media_nota_por(medias, campo, titulo):
+    fig = px.bar(
+        medias,
+        x=campo,
+        y="Nota",
+        text_auto=".1f",
+        labels={"Nota": "Média de Nota"},
+        color_discrete_sequence=[PRIMARY_COLOR]
+    )
+    return aplicar_tema_padrao(fig, titulo)
+
+
+def imagem_nuvem(frequencias, png=False):
+    """Nuvem de palavras a partir das frequências dos termos (ver termos.py).
+
+    Renderiza direto pelo PIL, sem figura do matplotlib: devolve a matriz RGB ou,
+    com `png=True`, os bytes de um PNG. Sem termos, devolve None.
+    """
+    if not frequencias:
+        return None
+    # wordcloud puxa o matplotlib: só carrega quando a nuvem é de fato desenhada
+    from wordcloud import WordCloud
+
+    with medir("wordcloud", entrada=len(frequencias)):
+        nuvem = WordCloud(background_color="white", width=800,
+                          height=400).generate_from_frequencies(frequencias)
+        if not png:
+            return nuvem.to_array()
+        buffer = io.BytesIO()
+        nuvem.to_image().save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+# ============================
+# Seções do dashboard
+# ============================
+# Cada seção devolve a lista de elementos a exibir, na ordem, como pares
+# (tipo, conteúdo): "grafico" (figura plotly), "titulo" (markdown), "imagem"
+# (matriz RGB ou PNG), "info" e "aviso" (textos). Assim o cálculo fica separado da
+# exibição e o resultado pode ser guardado em cache.
+#
+# Os blocos independentes de uma seção (agregação + figura) são tarefas: em sequência
+# no processo do app ou, com o pool aberto (`abrir_processos`), uma por processo; a
+# ordem dos elementos não muda.
+
+def _montar(tarefas):
+    # Roda as tarefas (pares nome, função sem argumento que devolve uma lista de itens)
+    # em sequência e junta os resultados na ordem original
+    itens = []
+    for nome, tarefa in tarefas:
+        with medir(f"gráfico: {nome}"):
+            itens += tarefa()
+    return itens
+
+
+def _mapa(df):
+    # Mapa por estado (malha local simplificada, carregada uma vez por processo)
+    with medir("geojson"):
+        geojson_data = carregar_geojson()
+    if geojson_data is None:
+        return [("aviso", "⚠️ Malha dos estados indisponível: ela é baixada em segundo plano "
+                          "quando há rede, ou gere o arquivo local com `python geo.py`.")]
+    return [("grafico", fig_estados(dados_estados(df), geojson_data))]
+
+
+def _nuvem(nuvem):
+    imagem = nuvem()
+    itens = [("titulo", "### ☁️ Principais Assuntos dos Chamados")]
+    if imagem is not None:
+        return itens + [("imagem", imagem)]
+    return itens + [("info", "Nenhum assunto para exibir com os filtros atuais.")]
+
+
+def _abertos_por_dia(series, selecoes):
+    # Linha temporal (média por dia do calendário com chamados)
+    por_dia = dados_abertos_por_dia(series, selecoes)
+    media_diaria = por_dia["Chamados"].mean() if len(por_dia) else 0
+    return [("grafico", fig_abertos_por_dia(por_dia, media_diaria))]
+
+
+def tarefas_indicadores(df, nuvem, series, selecoes=None):
+    # `nuvem` é uma função que devolve a imagem da nuvem de assuntos (ou None); as
+    # séries de tempo e o heatmap saem dos agregados em `series` (ver series.py)
+    return [
+        ("abertos por dia", lambda: _abertos_por_dia(series, selecoes)),
+        # Mês de encerramento com % e total
+        ("encerrados por mês", lambda: [
+            ("grafico", fig_encerrados_por_mes(dados_encerrados_por_mes(series, selecoes)))]),
+        # Status, SLA e prioridade
+        ("status", lambda: [("grafico", fig_status(contagem(df, "Status")))]),
+        ("sla", lambda: [("grafico", fig_sla(contagem(df, "SLA")))]),
+        ("prioridade", lambda: [("grafico", fig_prioridade(contagem(df, "NV. Prioridade")))]),
+        # Top 10 Solicitantes
+        ("top solicitantes", lambda: [("grafico", fig_top_solicitantes(dados_top_solicitantes(df)))]),
+        # Heatmap de horários
+        ("heatmap", lambda: [("grafico", fig_heatmap(dados_heatmap(series, selecoes)))]),
+        ("nuvem", lambda: _nuvem(nuvem)),
+        ("mapa", lambda: _mapa(df)),
+    ]
+
+
+def montar_indicadores(df, nuvem, series, selecoes=None):
+    return _montar(tarefas_indicadores(df, nuvem, series, selecoes))
+
+
+def tarefas_equipe(df):
+    tarefas = [("atendimento por analista", lambda: [
+        ("grafico", fig_media_atendimento_analista(dados_media_atendimento_analista(df)))])]
+
+    # Gráficos comparativos por loja, analista, setor
+    for campo, titulo in [
+        ("Loja", "Média de Atendimento e Solução por Loja"),
+        ("Analista", "Média de Atendimento e Solução por Analista"),
+        ("Setor", "Média de Atendimento e Solução por Setor"),
+    ]:
+        tarefas.append((f"média por {campo}", lambda campo=campo, titulo=titulo: [
+            ("grafico", fig_media_por(dados_media_por(df, campo), campo, titulo))]))
+    return tarefas
+
+
+def montar_equipe(df):
+    return _montar(tarefas_equipe(df))
+
+
+def _box_notas(df, media_nota):
+    estatisticas_notas, pontos_notas = dados_box_notas(df)
+    if estatisticas_notas.empty:
+        return [("info", "Ainda não há avaliações suficientes para exibir esse gráfico.")]
+    return [("grafico", fig_box_notas(estatisticas_notas, pontos_notas, media_nota))]
+
+
+def tarefas_avaliacao(df, media_nota):
+    tarefas = [
+        ("box de notas", lambda: _box_notas(df, media_nota)),
+        ("avaliações por analista", lambda: [
+            ("titulo", "### 🧮 Quantidade de Avaliações por Analista"),
+            ("grafico", fig_qtd_avaliacoes(dados_qtd_avaliacoes(df)))]),
+    ]
+
+    # Média de Avaliação por Setor e por Loja
+    for campo, titulo in [
+        ("Setor", "⭐Média de Avaliação por Setor"),
+        ("Loja", "⭐Média de Avaliação por Loja"),
+    ]:
+        tarefas.append((f"nota por {campo}", lambda campo=campo, titulo=titulo: [
+            ("grafico", fig_media_nota_por(dados_media_nota_por(df, campo), campo, titulo))]))
+    return tarefas
+
+
+def montar_avaliacao(df, media_nota):
+    return _montar(tarefas_avaliacao(df, media_nota))
+
+
+# ============================
+# Pool de processos
+# ============================
+# Threads não ajudavam (a montagem das figuras plotly segura o GIL: com 1M de linhas,
+# 2,0-2,2 s em sequência e 2,1-2,4 s com 4 threads). Os processos são abertos por fork
+# a cada versão dos dados e herdam o quadro e os agregados dela sem copiá-los; cada
+# tarefa leva só a seção, o bitmap dos filtros e as seleções, e volta com as figuras
+# em dicionário (fig.to_dict()).
+
+# Versão herdada pelos processos (definida antes do fork) e o pool aberto com ela
+_dataset_filhos = None
+_pool_filhos = None
+
+
+def _tarefas(secao, dataset, df, posicoes, selecoes_series, media_nota):
+    # As mesmas tarefas da seção montadas no app, a partir da versão herdada
+    if secao == "indicadores":
+        if selecoes_series is None:
+            series = SeriesTempo(df, [])
+        else:
+            series = dataset.series
+
+        def nuvem():
+            return imagem_nuvem(dataset.termos.frequencias(posicoes), png=True)
+
+        return tarefas_indicadores(df, nuvem, series, selecoes_series)
+    if secao == "equipe":
+        return tarefas_equipe(df)
+    return tarefas_avaliacao(df, media_nota)
+
+
+@lru_cache(maxsize=1)
+def _linhas_filho(bits):
+    # Linhas filtradas no processo, montadas uma vez por seleção (as tarefas da mesma
+    # seção chegam com o mesmo bitmap)
+    df = _dataset_filhos.df
+    if bits is None:
+        return df, np.arange(len(df))
+    posicoes = np.flatnonzero(np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=len(df)))
+    return df.iloc[posicoes], posicoes
+
+
+def _rodar_filho(secao, bits, selecoes_series, media_nota, indice):
+    df, posicoes = _linhas_filho(bits)
+    _, tarefa = _tarefas(secao, _dataset_filhos, df, posicoes, selecoes_series,
+                         media_nota)[indice]
+    return [(tipo, conteudo.to_dict() if tipo == "grafico" else conteudo)
+            for tipo, conteudo in tarefa()]
+
+
+def abrir_processos(dataset, processos):
+    """Abre, por fork, o pool de processos dos gráficos para a versão `dataset`.
+
+    Deve ser chamado com a versão já aquecida e antes de publicá-la (o atualizador faz
+    isso): nenhuma sessão usa os objetos dela ainda, então o fork não herda travas
+    ocupadas. O pool da versão anterior é encerrado.
+    """
+    global _dataset_filhos, _pool_filhos
+    # Importações tardias e malha dos estados carregadas uma vez, antes do fork
+    import wordcloud  # noqa: F401
+
+    carregar_geojson()
+    anterior = _pool_filhos
+    _dataset_filhos = dataset
+    pool = ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context("fork"))
+    # Com fork, os processos nascem no primeiro envio: força o fork aqui, nesta thread
+    pool.submit(int).result()
+    _pool_filhos = (dataset.versao, pool)
+    if anterior is not None:
+        anterior[1].shutdown(wait=False, cancel_futures=True)
+
+
+def fechar_processos():
+    global _dataset_filhos, _pool_filhos
+    if _pool_filhos is not None:
+        _pool_filhos[1].shutdown(wait=False, cancel_futures=True)
+    _dataset_filhos = _pool_filhos = None
+
+
+def montar_em_processos(secao, dataset, selecao, selecoes_series, media_nota=None):
+    """Monta a seção ("indicadores", "equipe" ou "avaliacao") no pool de processos.
+
+    `selecao` é a `Selecao` dos filtros; `selecoes_series` são os filtros das séries
+    de tempo, ou None quando elas saem das linhas filtradas (período ou assunto).
+    Retorna None se não houver pool aberto para esta versão (ou se ele foi trocado
+    no meio): quem chamou monta em sequência.
+    """
+    if _pool_filhos is None or _pool_filhos[0] != dataset.versao:
+        return None
+    pool = _pool_filhos[1]
+    bits = None
+    if len(selecao) < selecao.n:
+        bits = (selecao.bits if selecao.bits is not None else np.packbits(selecao.mascara)).tobytes()
+    quantas = len(_tarefas(secao, dataset, None, None, selecoes_series, media_nota))
+    with medir(f"gráficos em processos: {secao}"):
+        try:
+            futuros = [pool.submit(_rodar_filho, secao, bits, selecoes_series, media_nota, i)
+                       for i in range(quantas)]
+            resultados = [futuro.result() for futuro in futuros]
+        except (CancelledError, BrokenProcessPool, RuntimeError):
+            return None
+    # As figuras já foram validadas nos processos: remontá-las sem validar de novo
+    return [(tipo, go.Figure(conteudo, _validate=False) if tipo == "grafico" else conteudo)
+            for itens in resultados for tipo, conteudo in itens]
@@ -0,0 +1,192 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+
+# Dimensões com até este número de valores guardam um bitmap por valor; acima disso
+# (ex.: Solicitante) guardam listas de linhas por valor, que ocupam 4 bytes por linha
+LIMITE_BITMAP = 64
+# Seleções combinadas guardadas por índice (as mais recentes); cada uma ocupa n/8 bytes,
+# mais as posições e a máscara se alguém as pediu
+MEMO_SELECOES = 8
+# Bits ligados em cada valor de byte, para contar linhas sem desempacotar o bitmap
+# (numpy < 2.0, sem np.bitwise_count)
+_BITS_POR_BYTE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _contar_bits(bits):
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(_BITS_POR_BYTE[bits].sum())
+
+
+def _recortar(bits, ini, fim):
+    # Zera os bits fora de [ini, fim) (o packbits guarda o bit 0 no mais significativo)
+    resultado = np.zeros_like(bits)
+    if ini >= fim:
+        return resultado
+    b0, b1 = ini // 8, (fim + 7) // 8
+    resultado[b0:b1] = bits[b0:b1]
+    resultado[b0] &= 0xFF >> (ini - b0 * 8)
+    if fim % 8:
+        resultado[b1 - 1] &= (0xFF << (8 - fim % 8)) & 0xFF
+    return resultado
+
+
+class Selecao:
+    """Linhas que passam pelos filtros, guardadas como bitmap compactado.
+
+    A contagem sai do bitmap; as posições e a máscara booleana (O(n)) só são montadas
+    quando alguém precisa delas (a página da tabela, as linhas de um gráfico) e ficam
+    guardadas. Também pode nascer de posições já conhecidas, sem bitmap.
+    """
+
+    def __init__(self, n, bits=None, posicoes=None):
+        self.n = n
+        self.bits = bits
+        if posicoes is not None:
+            self.posicoes = posicoes
+
+    def __len__(self):
+        return self.total
+
+    @cached_property
+    def total(self):
+        if "posicoes" in self.__dict__:
+            return len(self.posicoes)
+        return _contar_bits(self.bits)
+
+    @cached_property
+    def posicoes(self):
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.n))
+
+    @cached_property
+    def mascara(self):
+        if self.bits is not None:
+            return np.unpackbits(self.bits, count=self.n).view(bool)
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[self.posicoes] = True
+        return mascara
+
+    def contem(self, posicoes):
+        """Máscara de quais `posicoes` estão na seleção (O(len(posicoes)), sem desempacotar)."""
+        if self.bits is None:
+            # Busca binária nas posições (ordenadas), para não montar a máscara inteira
+            lugar = np.searchsorted(self.posicoes, posicoes)
+            achou = lugar < len(self.posicoes)
+            achou[achou] = self.posicoes[lugar[achou]] == posicoes[achou]
+            return achou
+        return ((self.bits[posicoes >> 3] >> (7 - (posicoes & 7))) & 1).astype(bool)
+
+    def restringir(self, posicoes):
+        """Seleção só com as `posicoes` (ordenadas) que também estão nesta."""
+        return Selecao(self.n, posicoes=posicoes[self.contem(posicoes)])
+
+
+class IndiceFiltros:
+    """Índice dos filtros da barra lateral, construído uma vez por versão dos dados.
+
+    Cada dimensão categórica vira bitmaps compactados (np.packbits) ou listas de
+    linhas por valor. Filtrar é um E/OU bit a bit entre eles; dimensões marcadas
+    como "todos" (None) nem são consultadas. O período usa busca binária na coluna
+    de tempo, que precisa estar ordenada (sem coluna de tempo, só as dimensões).
+    `selecionar` devolve o bitmap combinado (`Selecao`), guardado por seleção.
+    """
+
+    def __init__(self, df, dimensoes, coluna_tempo="Abertura"):
+        self.n = len(df)
+        self.tempos = df[coluna_tempo].to_numpy() if coluna_tempo else None
+        self.categorias = {}
+        # Valor -> código de cada dimensão, para traduzir a seleção sem montar um Index
+        self.codigos = {}
+        self.bitmaps = {}
+        self.listas = {}
+        # "Todos" no filtro original (isin com todas as opções) já excluía linhas com
+        # dimensão vazia; essa base guarda isso para que pular a dimensão seja exato
+        base = np.ones(self.n, dtype=bool)
+        for coluna in dimensoes:
+            codigos = df[coluna].cat.codes.to_numpy()
+            base &= codigos >= 0
+            categorias = df[coluna].cat.categories
+            self.categorias[coluna] = categorias
+            self.codigos[coluna] = {valor: c for c, valor in enumerate(categorias)}
+            if len(categorias) <= LIMITE_BITMAP:
+                self.bitmaps[coluna] = np.stack(
+                    [np.packbits(codigos == c) for c in range(len(categorias))]
+                ) if len(categorias) else np.zeros((0, (self.n + 7) // 8), dtype=np.uint8)
+            else:
+                ordem = np.argsort(codigos, kind="stable").astype(np.int32)
+                limites = np.searchsorted(codigos[ordem], np.arange(len(categorias) + 1))
+                self.listas[coluna] = (ordem, limites)
+        self.base = np.packbits(base)
+        self.todas = np.flatnonzero(base)
+        self._selecoes = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _bits_valores(self, coluna, codigos):
+        if coluna in self.bitmaps:
+            if len(codigos) == 0:
+                return np.zeros_like(self.base)
+            return np.bitwise_or.reduce(self.bitmaps[coluna][codigos], axis=0)
+        ordem, limites = self.listas[coluna]
+        mascara = np.zeros(self.n, dtype=bool)
+        for c in codigos:
+            mascara[ordem[limites[c]:limites[c + 1]]] = True
+        return np.packbits(mascara)
+
+    def _bits_dimensao(self, coluna, valores):
+        categorias = self.categorias[coluna]
+        por_valor = self.codigos[coluna]
+        codigos = np.array(sorted({por_valor[v] for v in valores if v in por_valor}), dtype=np.intp)
+        # Com mais da metade dos valores selecionada, sai mais barato negar o resto
+        if 2 * len(codigos) > len(categorias):
+            resto = np.setdiff1d(np.arange(len(categorias)), codigos)
+            return ~self._bits_valores(coluna, resto)
+        return self._bits_valores(coluna, codigos)
+
+    def intervalo(self, inicio, fim):
+        # Mesmo critério de Abertura >= inicio e Abertura <= fim, por busca binária
+        ini = np.searchsorted(self.tempos, np.datetime64(inicio), side="left")
+        fim = np.searchsorted(self.tempos, np.datetime64(fim), side="right")
+        return ini, fim
+
+    def _combinar(self, ativos, periodo):
+        ini, fim = self.intervalo(*periodo) if periodo is not None else (0, self.n)
+        if not ativos:
+            # Nenhuma dimensão filtrada: as posições saem de um recorte das linhas válidas
+            posicoes = self.todas[np.searchsorted(self.todas, ini):np.searchsorted(self.todas, fim)]
+            return Selecao(self.n, posicoes=posicoes)
+
+        bits = self.base
+        for coluna, valores in ativos.items():
+            bits = bits & self._bits_dimensao(coluna, valores)
+        if periodo is not None:
+            bits = _recortar(bits, ini, fim)
+        return Selecao(self.n, bits=bits)
+
+    def selecionar(self, selecoes, periodo=None):
+        """Retorna a `Selecao` (bitmap) das linhas que passam pelos filtros.
+
+        `selecoes` mapeia dimensão -> valores escolhidos, ou None para "todos".
+        `periodo` é um par (início, fim) opcional.
+        """
+        ativos = {c: v for c, v in selecoes.items() if v is not None}
+        chave = (tuple(sorted((c, tuple(sorted({str(v) for v in valores})))
+                              for c, valores in ativos.items())),
+                 None if periodo is None else tuple(str(p) for p in periodo))
+        with self._trava:
+            selecao = self._selecoes.get(chave)
+            if selecao is not None:
+                self._selecoes.move_to_end(chave)
+                return selecao
+        selecao = self._combinar(ativos, periodo)
+        with self._trava:
+            self._selecoes[chave] = selecao
+            while len(self._selecoes) > MEMO_SELECOES:
+                self._selecoes.popitem(last=False)
+        return selecao
+
+    def filtrar(self, selecoes, periodo=None):
+        """Posições das linhas que passam pelos filtros (ver `selecionar`)."""
+        return self.selecionar(selecoes, periodo).posicoes
@@ -0,0 +1,170 @@
+"""Tempos por etapa de cada execução do app, em log JSON e num painel de administração.
+
+Desligado por padrão: `medir` devolve um objeto vazio e o custo é uma chamada de
+função. Configuração por variáveis de ambiente:
+    DASH_INSTRUMENTACAO=1  -> mede as etapas
+    DASH_LOG_TEMPOS        -> arquivo onde gravar as linhas JSON (sem ele, vão para o
+                              logger "instrumentacao" e seguem a configuração do logging)
+    DASH_ADMIN_TOKEN       -> com ?admin=<token> na URL, mostra o painel na barra lateral
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+import numpy as np
+
+ATIVO = os.environ.get("DASH_INSTRUMENTACAO", "0") == "1"
+ARQ_LOG = os.environ.get("DASH_LOG_TEMPOS", "")
+TOKEN_ADMIN = os.environ.get("DASH_ADMIN_TOKEN", "")
+# Quantas medições recentes de cada etapa entram nos percentis
+JANELA = 500
+
+logger = logging.getLogger(__name__)
+if ARQ_LOG:
+    _handler = logging.FileHandler(ARQ_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_execucao = contextvars.ContextVar("execucao", default=None)
+_nivel = contextvars.ContextVar("nivel", default=0)
+_historico = defaultdict(lambda: deque(maxlen=JANELA))
+_trava = threading.Lock()
+
+
+class _Nula:
+    # Medição desligada: aceita o mesmo uso e não faz nada
+    saida = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULA = _Nula()
+
+
+class Execucao:
+    """Etapas medidas numa execução do script (um rerun de uma sessão)."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.inicio = time.perf_counter()
+        self.etapas = []
+
+
+class _Medicao:
+    def __init__(self, nome, entrada):
+        self.nome = nome
+        self.entrada = entrada
+        self.saida = None
+
+    def __enter__(self):
+        self._nivel = _nivel.get()
+        self._token = _nivel.set(self._nivel + 1)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        fim = time.perf_counter()
+        _nivel.reset(self._token)
+        execucao = _execucao.get()
+        etapa = {
+            "execucao": execucao.id if execucao else None,
+            "etapa": self.nome,
+            "nivel": self._nivel,
+            "inicio_ms": round((self._inicio - execucao.inicio) * 1000, 3) if execucao else None,
+            "ms": round((fim - self._inicio) * 1000, 3),
+            "entrada": self.entrada,
+            "saida": self.saida,
+            "erro": tipo.__name__ if tipo else None,
+        }
+        with _trava:
+            _historico[self.nome].append(etapa["ms"])
+        if execucao is not None:
+            execucao.etapas.append(etapa)
+        else:
+            # Fora de uma execução (ex.: atualização dos dados em segundo plano)
+            _registrar(etapa)
+        return False
+
+
+def medir(nome, entrada=None):
+    """Mede o bloco `with` como a etapa `nome`; `entrada`/`.saida` são contagens de linhas."""
+    if not ATIVO:
+        return _NULA
+    return _Medicao(nome, entrada)
+
+
+def _registrar(registro):
+    logger.info(json.dumps({"ts": round(time.time(), 3), **registro},
+                           ensure_ascii=False, default=str))
+
+
+def iniciar_execucao():
+    if not ATIVO:
+        return None
+    execucao = Execucao()
+    _execucao.set(execucao)
+    _nivel.set(0)
+    return execucao
+
+
+def finalizar_execucao():
+    """Grava as etapas da execução atual no log e devolve a execução (ou None)."""
+    execucao = _execucao.get()
+    if execucao is None:
+        return None
+    _execucao.set(None)
+    total = round((time.perf_counter() - execucao.inicio) * 1000, 3)
+    with _trava:
+        _historico["execução"].append(total)
+    for etapa in list(execucao.etapas):
+        _registrar(etapa)
+    _registrar({"execucao": execucao.id, "etapa": "execução", "nivel": 0,
+                "inicio_ms": 0.0, "ms": total})
+    execucao.total_ms = total
+    return execucao
+
+
+def percentis():
+    """p50/p90/p99 e quantidade das medições recentes de cada etapa."""
+    with _trava:
+        historico = {nome: list(tempos) for nome, tempos in _historico.items()}
+    linhas = []
+    for nome, tempos in sorted(historico.items()):
+        p50, p90, p99 = np.percentile(tempos, [50, 90, 99])
+        linhas.append({"Etapa": nome, "n": len(tempos), "p50 (ms)": round(p50, 1),
+                       "p90 (ms)": round(p90, 1), "p99 (ms)": round(p99, 1)})
+    return linhas
+
+
+def eh_admin(parametros):
+    return ATIVO and bool(TOKEN_ADMIN) and parametros.get("admin") == TOKEN_ADMIN
+
+
+def figura_execucao(execucao):
+    """Gráfico tipo flame: uma barra por etapa, na posição e duração em que rodou."""
+    import plotly.graph_objects as go
+
+    etapas = sorted(execucao.etapas, key=lambda e: e["inicio_ms"])
+    rotulos = [f"{'  ' * e['nivel']}{e['etapa']} #{i}" for i, e in enumerate(etapas)]
+    fig = go.Figure(go.Bar(
+        y=rotulos,
+        x=[e["ms"] for e in etapas],
+        base=[e["inicio_ms"] for e in etapas],
+        orientation="h",
+        text=[f"{e['ms']:.0f} ms" for e in etapas],
+        hovertext=[f"entrada: {e['entrada']} | saída: {e['saida']}" for e in etapas],
+    ))
+    fig.update_layout(yaxis={"autorange": "reversed"}, xaxis_title="ms desde o início",
+                      height=max(250, 22 * len(etapas)), margin={"l": 10, "r": 10, "t": 10, "b": 10})
+    return fig
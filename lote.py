@@ -0,0 +1,268 @@
+"""Relatórios em lote: o Relatório Inteligente e os gráficos das abas em HTML estático.
+
+Uso:
+    python lote.py --por Loja                        # uma página por loja, último mês dos dados
+    python lote.py --por Setor --mes 2025-06 --saida relatorios/
+    python lote.py --por Loja --mes todos --processos 4
+    python lote.py --presets presets.json            # lista de {"nome", "selecoes", "periodo"}
+
+Usa as mesmas funções do dashboard (KPIs do cubo, `graficos.montar_*`, textos de
+`relatorio.py`), sem Streamlit. Cada relatório é um arquivo HTML com os cards, o
+Relatório Inteligente, as figuras como JSON do Plotly e a nuvem de palavras em PNG
+embutido. Por padrão o plotly.js (~4,6 MB) vai dentro de cada arquivo (--plotlyjs
+embutido), que abre sozinho e sem internet, como anexo de e-mail; com --plotlyjs
+pasta ele vai uma única vez para a pasta de saída (arquivos pequenos, que só abrem
+junto dele) e com cdn é baixado da internet ao abrir.
+
+Os presets são distribuídos num pool de processos. O conjunto de dados é carregado
+e indexado uma vez, no processo principal; os processos do pool nascem dele por
+fork e usam a mesma cópia (páginas do snapshot em memory-map e índices
+compartilhados por copy-on-write). Onde não há fork, cada processo abre o snapshot
+ao iniciar.
+"""
+import argparse
+import base64
+import html
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import graficos
+from agregados import agregar, kpis
+from esbocos import percentis_linhas
+from atualizador import aquecer
+from dados import FILTROS, carregar_dados, opcoes_dimensao
+from geo import carregar_geojson, preparar_geojson
+from relatorio import html_cards, html_cards_percentis, html_relatorio, valores_indicadores
+from series import SeriesTempo
+
+ARQ_CSS = Path("assecs") / "style.css"
+ARQ_PLOTLYJS = "plotly.min.js"
+CDN_PLOTLYJS = "https://cdn.plot.ly/plotly-2.35.2.min.js"
+SECOES = [("📊 Indicadores Gerais", "indicadores"), ("📈 Desempenho por Equipe", "equipe"),
+          ("⭐ Avaliação", "avaliacao")]
+
+# Versão carregada no processo principal (herdada pelos processos do pool via fork)
+_dataset = None
+
+
+def _carregar(fonte=None):
+    global _dataset
+    if _dataset is None:
+        _dataset = aquecer(carregar_dados(fonte, ttl=float("inf")))
+    return _dataset
+
+
+def _aquecer_graficos():
+    # Importações tardias e malha dos estados carregadas uma vez, antes do fork
+    import wordcloud  # noqa: F401
+
+    preparar_geojson()
+    carregar_geojson()
+
+
+def presets_por(dataset, dimensao, mes="ultimo"):
+    """Um preset por valor de `dimensao` (ex.: cada Loja), num mês ou em todo o histórico."""
+    meses = opcoes_dimensao(dataset.df, "Month")
+    if mes == "ultimo":
+        mes = meses[-1] if meses else "todos"
+    presets = []
+    for valor in opcoes_dimensao(dataset.df, dimensao):
+        selecoes = {dimensao: [valor]}
+        if mes != "todos":
+            selecoes["Month"] = [mes]
+        presets.append({"nome": f"{valor} - {mes}", "selecoes": selecoes, "periodo": None})
+    return presets
+
+
+def _arquivo(nome):
+    # Nome de arquivo seguro a partir do nome do preset
+    nome = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return re.sub(r"[^\w.-]+", "_", nome).strip("_").lower() + ".html"
+
+
+def _html_itens(itens):
+    partes = []
+    for tipo, conteudo in itens:
+        if tipo == "grafico":
+            # JSON da figura; "</" escapado para não fechar o <script> antes da hora
+            dados = conteudo.to_json().replace("</", "<\\/")
+            partes.append(f'<div class="figura"></div>'
+                          f'<script type="application/json" data-figura>{dados}</script>')
+        elif tipo == "titulo":
+            nivel = len(conteudo) - len(conteudo.lstrip("#"))
+            partes.append(f"<h{nivel or 3}>{html.escape(conteudo.lstrip('# '))}</h{nivel or 3}>")
+        elif tipo == "imagem":
+            png = base64.b64encode(conteudo).decode("ascii")
+            partes.append(f'<img src="data:image/png;base64,{png}" style="width: 100%;">')
+        elif tipo in ("info", "aviso"):
+            classe = "report-badge-info" if tipo == "info" else "report-badge-warning"
+            partes.append(f'<div class="report-badge {classe}">{html.escape(conteudo)}</div>')
+    return "\n".join(partes)
+
+
+def _script_plotly(plotlyjs):
+    if plotlyjs == "embutido":
+        from plotly.offline import get_plotlyjs
+
+        return f"<script>{get_plotlyjs()}</script>"
+    src = CDN_PLOTLYJS if plotlyjs == "cdn" else ARQ_PLOTLYJS
+    return f'<script src="{src}"></script>'
+
+
+def montar_html(titulo, valores, secoes, css, plotlyjs="embutido"):
+    cards = "".join(f'<div class="coluna">{card}</div>' for card in html_cards(valores))
+    cards_percentis = "".join(f'<div class="coluna">{card}</div>'
+                              for card in html_cards_percentis(valores))
+    corpo = "".join(f"<h2>{nome}</h2>\n{_html_itens(itens)}" for nome, itens in secoes)
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(titulo)}</title>
+<style>{css}
+.colunas {{ display: flex; gap: 1rem; }} .coluna {{ flex: 1; }}
+.conteudo {{ max-width: 1200px; margin: 0 auto; padding: 1rem; }}
+</style>
+{_script_plotly(plotlyjs)}
+</head>
+<body>
+<div class="conteudo">
+<h1>{html.escape(titulo)}</h1>
+<div class="colunas">{cards}</div>
+<div class="colunas">{cards_percentis}</div>
+{html_relatorio(valores)}
+{corpo}
+</div>
+<script>
+document.querySelectorAll("script[data-figura]").forEach(function (s) {{
+    var figura = JSON.parse(s.textContent);
+    Plotly.newPlot(s.previousElementSibling, figura.data, figura.layout, {{responsive: true}});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def gerar_relatorio(preset, pasta, plotlyjs="embutido", css=""):
+    """Gera o HTML de um preset; retorna (nome, arquivo, chamados, segundos)."""
+    inicio = time.perf_counter()
+    dataset = _carregar()
+    df = dataset.df
+    selecoes = {c: preset["selecoes"].get(c) for c in FILTROS}
+    periodo = preset.get("periodo")
+    if periodo:
+        periodo = (pd.to_datetime(periodo[0]), pd.to_datetime(periodo[1]))
+    posicoes = dataset.indice.filtrar(selecoes, periodo)
+    df_filtrado = df if len(posicoes) == len(df) else df.iloc[posicoes]
+
+    # Mesmos caminhos do app: cubo e agregados de tempo sem período; linhas filtradas com ele
+    if periodo is None:
+        indicadores = {**dataset.cubo.kpis(selecoes), **dataset.quantis.percentis(selecoes)}
+        series, selecoes_series = dataset.series, selecoes
+    else:
+        indicadores = {**kpis(agregar(df_filtrado, FILTROS)), **percentis_linhas(df_filtrado)}
+        series, selecoes_series = SeriesTempo(df_filtrado, []), None
+
+    def nuvem():
+        return graficos.imagem_nuvem(dataset.termos.frequencias(posicoes), png=True)
+
+    # Um relatório por processo: os gráficos de cada um rodam em sequência
+    secoes = [
+        (SECOES[0][0], graficos.montar_indicadores(df_filtrado, nuvem, series, selecoes_series)),
+        (SECOES[1][0], graficos.montar_equipe(df_filtrado)),
+        (SECOES[2][0], graficos.montar_avaliacao(df_filtrado, indicadores["media_nota"])),
+    ]
+    arquivo = Path(pasta) / _arquivo(preset["nome"])
+    arquivo.write_text(montar_html(preset["nome"], valores_indicadores(indicadores), secoes,
+                                   css, plotlyjs), encoding="utf-8")
+    return preset["nome"], arquivo.name, len(posicoes), time.perf_counter() - inicio
+
+
+def gerar_lote(presets, pasta, processos=None, plotlyjs="embutido", fonte=None):
+    """Gera todos os presets num pool de processos; retorna a lista de resultados."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    css = ARQ_CSS.read_text(encoding="utf-8") if ARQ_CSS.exists() else ""
+    if plotlyjs == "pasta":
+        from plotly.offline import get_plotlyjs
+
+        (pasta / ARQ_PLOTLYJS).write_text(get_plotlyjs(), encoding="utf-8")
+
+    _carregar(fonte)
+    _aquecer_graficos()
+    processos = processos or os.cpu_count() or 1
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+    resultados, erros = [], []
+    with ProcessPoolExecutor(processos, mp_context=contexto, initializer=_carregar,
+                             initargs=(fonte,)) as pool:
+        futuros = {pool.submit(gerar_relatorio, preset, pasta, plotlyjs, css): preset
+                   for preset in presets}
+        for futuro in as_completed(futuros):
+            try:
+                resultados.append(futuro.result())
+            except Exception as erro:
+                erros.append((futuros[futuro]["nome"], erro))
+    return resultados, erros
+
+
+def gravar_indice(pasta, resultados):
+    # Página inicial com um link para cada relatório
+    linhas = "".join(
+        f'<li><a href="{html.escape(arquivo)}">{html.escape(nome)}</a> ({chamados} chamados)</li>'
+        for nome, arquivo, chamados, _ in sorted(resultados))
+    (Path(pasta) / "index.html").write_text(
+        f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">'
+        f"<title>Relatórios</title></head><body><h1>Relatórios</h1><ul>{linhas}</ul></body></html>",
+        encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--por", choices=FILTROS, help="um relatório por valor da dimensão")
+    grupo.add_argument("--presets", help="JSON com a lista de presets")
+    parser.add_argument("--mes", default="ultimo",
+                        help='mês "AAAA-MM" dos relatórios de --por, "ultimo" ou "todos"')
+    parser.add_argument("--saida", default="relatorios", help="pasta dos arquivos HTML")
+    parser.add_argument("--processos", type=int, help="tamanho do pool (padrão: núcleos)")
+    parser.add_argument("--plotlyjs", choices=["embutido", "pasta", "cdn"], default="embutido",
+                        help="embutido: cada HTML abre sozinho, offline (~4,6 MB a mais "
+                             "por arquivo); pasta: um plotly.min.js compartilhado na "
+                             "pasta de saída (arquivos pequenos, abrem só junto dele); "
+                             "cdn: baixado da internet ao abrir")
+    parser.add_argument("--fonte", help="CSV ou URL (padrão: DASH_FONTE_DADOS / planilha)")
+    args = parser.parse_args()
+
+    # Como o app, roda a partir da pasta dele (snapshot, CSS e malha dos estados usam
+    # caminhos relativos); os caminhos da linha de comando são resolvidos antes
+    saida = Path(args.saida).resolve()
+    arq_presets = args.presets and Path(args.presets).resolve()
+    fonte = args.fonte
+    if fonte and Path(fonte).exists():
+        fonte = str(Path(fonte).resolve())
+    os.chdir(Path(__file__).resolve().parent)
+
+    inicio = time.perf_counter()
+    if arq_presets:
+        presets = json.loads(arq_presets.read_text(encoding="utf-8"))
+    else:
+        presets = presets_por(_carregar(fonte), args.por, args.mes)
+    resultados, erros = gerar_lote(presets, saida, args.processos, args.plotlyjs, fonte)
+    gravar_indice(saida, resultados)
+    duracao = time.perf_counter() - inicio
+    for nome, erro in erros:
+        print(f"ERRO {nome}: {erro}", file=sys.stderr)
+    print(f"{len(resultados)} relatório(s) em {duracao:.1f} s "
+          f"({len(resultados) / duracao * 60:.0f}/min) em {args.saida}/")
+    sys.exit(1 if erros else 0)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuração por variáveis de ambiente:
+#   DASH_MEMO_MAX -> quantidade máxima de entradas guardadas
+#   DASH_MEMO_TTL -> segundos que uma entrada vale
+#   DASH_MEMO_TABELA_MB -> memória máxima das posições da tabela guardadas (ordem, filtro)
+#   DASH_ABAS_SOB_DEMANDA -> "0" volta a montar todas as abas a cada interação
+#   DASH_ANTECIPAR -> "0" desliga o cálculo antecipado das abas que não estão abertas
+MEMO_MAX = int(os.environ.get("DASH_MEMO_MAX", "256"))
+MEMO_TTL = int(os.environ.get("DASH_MEMO_TTL", "900"))
+MEMO_TABELA_MB = int(os.environ.get("DASH_MEMO_TABELA_MB", "64"))
+ABAS_SOB_DEMANDA = os.environ.get("DASH_ABAS_SOB_DEMANDA", "1") != "0"
+ANTECIPAR = os.environ.get("DASH_ANTECIPAR", "1") != "0"
+
+
+def chave_filtros(selecoes, periodo=None, assunto=None):
+    """Impressão digital canônica do estado dos filtros.
+
+    Listas viram conjuntos ordenados (a ordem de seleção e repetições não mudam a
+    chave) e "selecionar todos" (None) é distinto de escolher todas as opções à mão.
+    `assunto` é a busca por assunto já normalizada (None quando vazia).
+    """
+    canonico = {
+        coluna: None if valores is None else sorted({str(v) for v in valores})
+        for coluna, valores in sorted(selecoes.items())
+    }
+    canonico["_periodo"] = None if periodo is None else [str(p) for p in periodo]
+    canonico["_assunto"] = assunto
+    texto = json.dumps(canonico, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _tamanho(valor):
+    # Só os arrays contam (figuras e KPIs são pequenos e limitados pela quantidade)
+    return getattr(valor, "nbytes", 0)
+
+
+class CacheLRU:
+    """Cache LRU com TTL, compartilhado entre as sessões do processo.
+
+    As entradas pertencem a uma versão dos dados: quando chega uma versão nova,
+    tudo o que foi calculado com a anterior é descartado. Além da quantidade de
+    entradas, `max_bytes` limita a memória somada dos arrays guardados.
+    """
+
+    def __init__(self, max_itens=MEMO_MAX, ttl=MEMO_TTL, max_bytes=None):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.versao = None
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        # Cálculos antecipados em andamento: chave -> Future
+        self._pendentes = {}
+        self._executor = None
+
+    def _valido(self, versao, chave, agora):
+        # Chamado com a trava; descarta tudo se a versão dos dados mudou
+        if versao != self.versao:
+            self._itens.clear()
+            self.bytes = 0
+            self.versao = versao
+        item = self._itens.get(chave)
+        if item is not None and agora - item[0] < self.ttl:
+            self._itens.move_to_end(chave)
+            return item
+        return None
+
+    def obter(self, versao, chave, calcular):
+        """Devolve o valor guardado para `chave` ou calcula, guarda e devolve."""
+        agora = time.monotonic()
+        with self._trava:
+            item = self._valido(versao, chave, agora)
+            if item is not None:
+                self.acertos += 1
+                return item[1]
+            futuro = self._pendentes.get((versao, chave))
+            if futuro is not None:
+                self.acertos += 1
+            else:
+                self.faltas += 1
+
+        if futuro is not None:
+            # Já está sendo calculado em segundo plano: espera em vez de repetir
+            try:
+                return futuro.result()
+            except Exception:
+                pass
+        return self._preencher(versao, chave, calcular, agora)
+
+    def antecipar(self, versao, chave, calcular):
+        """Agenda o cálculo de `chave` em segundo plano, se ainda não estiver guardado.
+
+        Usado para adiantar as seções que o usuário ainda não abriu; quem pedir a
+        mesma chave depois reaproveita o resultado (ou espera o cálculo terminar).
+        """
+        with self._trava:
+            if (self._valido(versao, chave, time.monotonic()) is not None
+                    or (versao, chave) in self._pendentes):
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1,
+                                                    thread_name_prefix="dash-antecipar")
+            futuro = self._executor.submit(
+                self._preencher, versao, chave, calcular, time.monotonic())
+            self._pendentes[(versao, chave)] = futuro
+        futuro.add_done_callback(lambda _: self._descartar_pendente(versao, chave))
+
+    def _descartar_pendente(self, versao, chave):
+        with self._trava:
+            self._pendentes.pop((versao, chave), None)
+
+    def _preencher(self, versao, chave, calcular, agora):
+        # Calcula fora da trava para não segurar as outras sessões
+        valor = calcular()
+        tamanho = _tamanho(valor)
+        with self._trava:
+            if versao == self.versao and (self.max_bytes is None or tamanho <= self.max_bytes):
+                antigo = self._itens.pop(chave, None)
+                if antigo is not None:
+                    self.bytes -= antigo[2]
+                self._itens[chave] = (agora, valor, tamanho)
+                self.bytes += tamanho
+                while len(self._itens) > self.max_itens or (
+                        self.max_bytes is not None and self.bytes > self.max_bytes):
+                    self.bytes -= self._itens.popitem(last=False)[1][2]
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.acertos + self.faltas
+            return {
+                "entradas": len(self._itens),
+                "bytes": self.bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / total if total else 0.0,
+            }
+
+
+# Instâncias únicas do processo (o módulo é importado uma vez e vale para todas as sessões)
+CACHE = CacheLRU()
+# Posições da tabela (ordem global e linhas filtradas): um array int64 por linha dos
+# dados cada, então o limite é de memória e não de quantidade
+CACHE_TABELA = CacheLRU(max_bytes=MEMO_TABELA_MB << 20)
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Motor das consultas sobre as linhas filtradas (DASH_MOTOR): "pandas" (padrão),
+# "duckdb" ou "polars". Os dois últimos são opcionais: sem o pacote instalado, o
+# dashboard avisa no log e segue com o pandas.
+MOTOR_PADRAO = os.environ.get("DASH_MOTOR", "pandas")
+
+# Operações de agregação aceitas em `medidas`
+OPERACOES = ("contar", "soma", "media")
+
+
+class Motor:
+    """Executa as consultas do dashboard: agrupar linhas e calcular medidas por grupo.
+
+    Toda consulta é descrita uma vez como (df, chaves, medidas), com
+    `medidas = {nome: (operação, coluna)}`; "contar" com coluna None conta linhas e,
+    com coluna, só os valores não vazios; "soma" e "media" ignoram os vazios. Só
+    entram grupos presentes nos dados e com todas as chaves preenchidas. O
+    resultado sai igual em qualquer motor: uma linha por grupo, chaves com o mesmo
+    tipo da entrada (categóricas com as mesmas categorias), ordenado pelas chaves.
+    """
+
+    nome = None
+
+    def agrupar(self, df, chaves, medidas):
+        chaves = list(chaves)
+        for operacao, _ in medidas.values():
+            if operacao not in OPERACOES:
+                raise ValueError(f"Operação desconhecida: {operacao}")
+        colunas = list(dict.fromkeys(
+            chaves + [c for _, c in medidas.values() if c is not None]))
+        resultado = self._agrupar(df[colunas], chaves, medidas)
+        return self._ajustar(resultado, df, chaves, medidas)
+
+    def _agrupar(self, df, chaves, medidas):
+        raise NotImplementedError
+
+    def _ajustar(self, resultado, df, chaves, medidas):
+        # Mesmos tipos e ordem do pandas, qualquer que seja o motor
+        for chave in chaves:
+            if isinstance(df[chave].dtype, pd.CategoricalDtype):
+                resultado[chave] = pd.Categorical(resultado[chave], dtype=df[chave].dtype)
+            else:
+                resultado[chave] = resultado[chave].astype(df[chave].dtype)
+        for nome, (operacao, coluna) in medidas.items():
+            if operacao == "contar":
+                resultado[nome] = resultado[nome].astype("int64")
+            elif operacao == "soma" and df[coluna].dtype.kind in "iub":
+                resultado[nome] = resultado[nome].astype("int64")
+            else:
+                resultado[nome] = resultado[nome].astype("float64")
+        resultado = resultado[chaves + list(medidas)]
+        return resultado.sort_values(chaves, kind="stable").reset_index(drop=True)
+
+
+class MotorPandas(Motor):
+    nome = "pandas"
+
+    def _agrupar(self, df, chaves, medidas):
+        grupos = df.groupby(chaves, observed=True)
+        partes = {}
+        for nome, (operacao, coluna) in medidas.items():
+            if coluna is None:
+                partes[nome] = grupos.size()
+            elif operacao == "contar":
+                partes[nome] = grupos[coluna].count()
+            elif operacao == "soma":
+                partes[nome] = grupos[coluna].sum()
+            else:
+                partes[nome] = grupos[coluna].mean()
+        return pd.DataFrame(partes).reset_index()
+
+
+class MotorDuckDB(Motor):
+    """DuckDB em processo: lê o DataFrame sem copiá-lo e agrega em várias threads."""
+
+    nome = "duckdb"
+    FUNCOES = {"contar": "count", "soma": "sum", "media": "avg"}
+
+    def __init__(self):
+        import duckdb
+
+        self._conexao = duckdb.connect()
+        self._local = threading.local()
+
+    def _cursor(self):
+        # Um cursor por thread (a conexão não pode ser usada por várias ao mesmo tempo)
+        if not hasattr(self._local, "cursor"):
+            self._local.cursor = self._conexao.cursor()
+        return self._local.cursor
+
+    def _agrupar(self, df, chaves, medidas):
+        # Colunas renomeadas para c0, c1...: o DuckDB não diferencia maiúsculas nos
+        # nomes (ex.: "SLA" e "sla" colidiriam)
+        nomes = {c: f"c{i}" for i, c in enumerate(df.columns)}
+        grupo = ", ".join(nomes[c] for c in chaves)
+        expressoes = [
+            f"count(*) AS m{i}" if coluna is None
+            else f"{self.FUNCOES[operacao]}({nomes[coluna]})::DOUBLE AS m{i}"
+            for i, (operacao, coluna) in enumerate(medidas.values())
+        ]
+        sql = (f"SELECT {grupo}, {', '.join(expressoes)} FROM linhas WHERE "
+               + " AND ".join(f"{nomes[c]} IS NOT NULL" for c in chaves)
+               + f" GROUP BY {grupo}")
+        cursor = self._cursor()
+        cursor.register("linhas", df.set_axis(list(nomes.values()), axis=1))
+        try:
+            resultado = cursor.execute(sql).df()
+        finally:
+            cursor.unregister("linhas")
+        resultado.columns = chaves + list(medidas)
+        return resultado
+
+
+class MotorPolars(Motor):
+    """Polars (Arrow, multi-thread) sobre uma cópia colunar das linhas consultadas."""
+
+    nome = "polars"
+
+    def __init__(self):
+        import polars
+
+        self._pl = polars
+
+    def _agrupar(self, df, chaves, medidas):
+        pl = self._pl
+        agregacoes = []
+        for nome, (operacao, coluna) in medidas.items():
+            if coluna is None:
+                agregacoes.append(pl.len().alias(nome))
+            elif operacao == "contar":
+                agregacoes.append(pl.col(coluna).count().alias(nome))
+            elif operacao == "soma":
+                agregacoes.append(pl.col(coluna).cast(pl.Float64).sum().alias(nome))
+            else:
+                agregacoes.append(pl.col(coluna).cast(pl.Float64).mean().alias(nome))
+        tabela = pl.from_pandas(df)
+        resultado = (tabela.lazy()
+                     .filter(pl.all_horizontal(pl.col(chaves).is_not_null()))
+                     .group_by(chaves)
+                     .agg(agregacoes)
+                     .collect())
+        return resultado.to_pandas()
+
+
+MOTORES = {"pandas": MotorPandas, "duckdb": MotorDuckDB, "polars": MotorPolars}
+
+
+@lru_cache(maxsize=None)
+def obter_motor(nome=None):
+    """Instância (única por processo) do motor `nome`, ou do configurado em DASH_MOTOR."""
+    nome = nome or MOTOR_PADRAO
+    if nome not in MOTORES:
+        raise ValueError(f"Motor desconhecido: {nome} (opções: {', '.join(MOTORES)})")
+    try:
+        return MOTORES[nome]()
+    except ImportError:
+        logger.warning("Motor %s indisponível (pacote não instalado); usando pandas", nome)
+        return MotorPandas()
@@ -0,0 +1,120 @@
+"""Confere se os motores de consulta dão os mesmos KPIs e dados de gráfico que o pandas.
+
+Uso:
+    python paridade.py                      # fonte configurada, todos os motores instalados
+    python paridade.py --fonte chamados.csv --motores duckdb polars --sorteios 100
+
+Para cada filtro sorteado (mais o "todos"), calcula os KPIs e os dados de cada
+gráfico com o pandas e com os outros motores e compara valor a valor. Termina com
+código 1 se houver qualquer diferença.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from agregados import agregar, kpis
+from dados import FILTROS, carregar_dados, opcoes_dimensao
+from graficos import (
+    contagem,
+    dados_estados,
+    dados_media_atendimento_analista,
+    dados_media_nota_por,
+    dados_media_por,
+    dados_qtd_avaliacoes,
+    dados_top_solicitantes,
+)
+from motores import MOTORES, obter_motor
+
+CONSULTAS = {
+    "kpis": lambda df, m: kpis(agregar(df, FILTROS, m)),
+    "status": lambda df, m: contagem(df, "Status", motor=m),
+    "sla": lambda df, m: contagem(df, "SLA", motor=m),
+    "prioridade": lambda df, m: contagem(df, "NV. Prioridade", motor=m),
+    "top_solicitantes": lambda df, m: dados_top_solicitantes(df, motor=m),
+    "estados": lambda df, m: dados_estados(df, motor=m),
+    "atendimento_analista": lambda df, m: dados_media_atendimento_analista(df, motor=m),
+    "media_loja": lambda df, m: dados_media_por(df, "Loja", motor=m),
+    "media_analista": lambda df, m: dados_media_por(df, "Analista", motor=m),
+    "media_setor": lambda df, m: dados_media_por(df, "Setor", motor=m),
+    "qtd_avaliacoes": lambda df, m: dados_qtd_avaliacoes(df, motor=m),
+    "nota_setor": lambda df, m: dados_media_nota_por(df, "Setor", motor=m),
+    "nota_loja": lambda df, m: dados_media_nota_por(df, "Loja", motor=m),
+}
+
+
+def _diferenca(esperado, obtido):
+    # Descrição da primeira diferença encontrada, ou None se forem iguais
+    if isinstance(esperado, dict):
+        for chave in esperado:
+            diferenca = _diferenca(esperado[chave], obtido.get(chave))
+            if diferenca:
+                return f"{chave}: {diferenca}"
+        return None
+    if isinstance(esperado, (pd.Series, pd.DataFrame)):
+        esperado = esperado.reset_index()
+        obtido = obtido.reset_index()
+        if list(esperado.columns) != list(obtido.columns) or len(esperado) != len(obtido):
+            return f"formato {esperado.shape} x {obtido.shape}"
+        for coluna in esperado.columns:
+            a, b = esperado[coluna], obtido[coluna]
+            if a.dtype.kind in "iuf" and b.dtype.kind in "iuf":
+                if not np.allclose(a.to_numpy(float), b.to_numpy(float), equal_nan=True):
+                    return f"coluna {coluna}"
+            elif not a.astype(str).equals(b.astype(str)):
+                return f"coluna {coluna}"
+        return None
+    if isinstance(esperado, (int, float, np.number)) and isinstance(obtido, (int, float, np.number)):
+        return None if np.isclose(esperado, obtido, equal_nan=True) else f"{esperado} x {obtido}"
+    return None if esperado == obtido else f"{esperado!r} x {obtido!r}"
+
+
+def sortear_selecoes(df, sorteios, semente=0):
+    rng = np.random.default_rng(semente)
+    selecoes = [{c: None for c in FILTROS}]
+    for _ in range(sorteios):
+        selecoes.append({
+            c: None if rng.random() < 0.6
+            else list(rng.choice(opcoes_dimensao(df, c), min(3, len(opcoes_dimensao(df, c))),
+                                 replace=False))
+            for c in FILTROS
+        })
+    return selecoes
+
+
+def verificar_paridade(dataset, motores, sorteios=30, semente=0):
+    """Compara todos os motores em `motores` com o pandas; retorna a lista de diferenças."""
+    referencia = obter_motor("pandas")
+    outros = [obter_motor(nome) for nome in motores if nome != "pandas"]
+    outros = [m for m in outros if m.nome != "pandas"]  # motores não instalados caem no pandas
+    diferencas = []
+    for selecoes in sortear_selecoes(dataset.df, sorteios, semente):
+        df = dataset.df.iloc[dataset.indice.filtrar(selecoes)]
+        for nome, consulta in CONSULTAS.items():
+            esperado = consulta(df, referencia)
+            for motor in outros:
+                diferenca = _diferenca(esperado, consulta(df, motor))
+                if diferenca:
+                    diferencas.append((motor.nome, nome, selecoes, diferenca))
+    return outros, diferencas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fonte", help="CSV ou URL (padrão: DASH_FONTE_DADOS / planilha)")
+    parser.add_argument("--motores", nargs="+", default=[m for m in MOTORES if m != "pandas"])
+    parser.add_argument("--sorteios", type=int, default=30)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = carregar_dados(args.fonte)
+    motores, diferencas = verificar_paridade(dataset, args.motores, args.sorteios, args.semente)
+    if not motores:
+        sys.exit("Nenhum motor além do pandas está instalado (pip install duckdb polars).")
+    for motor, consulta, selecoes, diferenca in diferencas[:20]:
+        ativos = {c: v for c, v in selecoes.items() if v is not None}
+        print(f"[{motor}] {consulta} {ativos}: {diferenca}")
+    print(f"{len(CONSULTAS)} consultas x {args.sorteios + 1} filtros x "
+          f"{', '.join(m.nome for m in motores)}: {len(diferencas)} diferença(s)")
+    sys.exit(1 if diferencas else 0)
@@ -0,0 +1,79 @@
+"""Medição da partida a frio do dashboard.
+
+Dentro do app, `marcar` registra quanto tempo cada etapa da primeira execução do
+processo levou desde o início (importações, dados, primeiro card de KPI); o
+resultado vai para o log e fica em `etapas()`.
+
+Fora do app, gera o relatório completo:
+    python perfil.py        # importação a frio por módulo + etapas de uma execução do app
+"""
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Módulos pesados e do próprio app medidos pelo relatório
+MODULOS = ["streamlit", "pandas", "numpy", "pyarrow", "requests", "plotly.express",
+           "wordcloud", "dados", "atualizador", "graficos", "motores"]
+
+INICIO = time.perf_counter()
+_etapas = {}
+_trava = threading.Lock()
+
+
+def marcar(rotulo):
+    """Registra, só na primeira vez do processo, o tempo desde o início até `rotulo`."""
+    with _trava:
+        if rotulo in _etapas:
+            return
+        _etapas[rotulo] = time.perf_counter() - INICIO
+    logger.info("Partida: %s em %.0f ms", rotulo, _etapas[rotulo] * 1000)
+
+
+def etapas():
+    with _trava:
+        return dict(_etapas)
+
+
+def reiniciar():
+    global INICIO
+    with _trava:
+        _etapas.clear()
+        INICIO = time.perf_counter()
+
+
+def tempo_importacao(modulo):
+    """Segundos para importar `modulo` num interpretador novo (cumulativo, -X importtime)."""
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                           capture_output=True, text=True, check=True).stderr
+    # Linhas "import time: self [us] | cumulative | pacote"; a do módulo pedido
+    # (sem recuo) traz o total dele e de tudo que ele puxou
+    for linha in saida.splitlines():
+        campos = re.match(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)", linha)
+        if campos and campos.group(4) == modulo and len(campos.group(3)) == 1:
+            return int(campos.group(2)) / 1e6
+    return None
+
+
+if __name__ == "__main__":
+    print("Importação a frio (interpretador novo por módulo):")
+    for modulo in MODULOS:
+        segundos = tempo_importacao(modulo)
+        print(f"  {modulo:<16} {'-' if segundos is None else f'{segundos * 1000:7.0f} ms'}")
+
+    from pathlib import Path
+
+    from streamlit.testing.v1 import AppTest
+
+    # O app importa "perfil" como módulo próprio (este arquivo roda como __main__)
+    import perfil
+
+    perfil.reiniciar()
+    AppTest.from_file(str(Path(__file__).resolve().with_name("app.py")), default_timeout=600).run()
+    print("Primeira execução do app (desde o início do script):")
+    for rotulo, segundos in perfil.etapas().items():
+        print(f"  {rotulo:<16} {segundos * 1000:7.0f} ms")
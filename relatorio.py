@@ -0,0 +1,161 @@
+"""Textos dos cards de KPI e do Relatório Inteligente, sem depender do Streamlit.
+
+Usado pelo app (dentro do st.markdown) e pelo modo lote (`lote.py`), que gera os
+mesmos relatórios em HTML estático.
+"""
+import pandas as pd
+
+
+def valores_indicadores(indicadores):
+    """Valores formatados e classes de cor dos KPIs (saída de `agregados.kpis`)."""
+    v = {"total_eventos": indicadores["total"]}
+    media_resolucao = indicadores["media_resolucao"]
+    v["media_resolucao_display"] = f"{media_resolucao:.1f} dias" if not pd.isna(
+        media_resolucao) else "N/A"
+    media_atendimento = indicadores["media_atendimento"]
+    v["media_atendimento_display"] = f"{media_atendimento:.1f} dias" if not pd.isna(
+        media_atendimento) else "N/A"
+
+    # Nota média (avaliações), com cor condicional
+    media_nota = indicadores["media_nota"]
+    v["media_nota_display"] = f"{media_nota:.1f}" if indicadores["qtd_avaliacoes"] > 0 else "N/A"
+    if media_nota >= 4.5:
+        v["nota_class"] = "kpi-green"
+    elif media_nota >= 3.0:
+        v["nota_class"] = "kpi-yellow"
+    else:
+        v["nota_class"] = "kpi-red"
+
+    v["qtd_critico"] = indicadores["qtd_critico"]
+    # Porcentagem de atendimento de status
+    total_status = indicadores["pct_status"]
+    pct_aberto = v["pct_aberto"] = round(total_status.get("Em aberto", 0), 1)
+    pct_andamento = v["pct_andamento"] = round(total_status.get("Em atendimento", 0), 1)
+    pct_solu = v["pct_solu"] = round(total_status.get("Encerrado", 0), 1)
+
+    # Em Aberto
+    v["aberto_value"] = f"{pct_aberto:.1f}%"
+    if pct_aberto == 0:
+        v["status_class_aberto"] = "kpi-gray"
+    else:
+        v["status_class_aberto"] = "kpi-red" if pct_aberto > 10 else "kpi-green"
+
+    # Em Atendimento
+    v["andamento_value"] = f"{pct_andamento:.1f}%"
+    if pct_andamento == 0:
+        v["status_class_andamento"] = "kpi-gray"
+    else:
+        v["status_class_andamento"] = "kpi-yellow" if pct_andamento > 5 else "kpi-green"
+
+    # Encerrados
+    v["encerrado_value"] = f"{pct_solu:.1f}%"
+    if pct_solu == 0:
+        v["status_class_solu"] = "kpi-gray"
+    else:
+        v["status_class_solu"] = "kpi-green" if pct_solu > 85 else "kpi-red"
+
+    # Sla em porcentagem
+    v["sla_atingido_pct"] = round(indicadores["sla_pct"], 1)
+
+    # Percentis de resolução e atendimento (p50 · p90 · p99), dos esboços de quantis
+    for nome in ("resolucao", "atendimento"):
+        p = indicadores[f"percentis_{nome}"]
+        v[f"percentis_{nome}_display"] = " · ".join(
+            f"{p[q]:.1f}" for q in (50, 90, 99)) + " dias" if not pd.isna(p[50]) else "N/A"
+    return v
+
+
+def html_card(valor, titulo, dica, classe=""):
+    return f"""
+    <div class="{f'kpi-card {classe}'.rstrip()}" title="{dica}">
+        <div class="kpi-value">{valor}</div>
+        <div class="kpi-title">{titulo}</div>
+    </div>
+    """
+
+
+def html_cards(v):
+    """Os cinco cards de KPI do topo, na ordem do dashboard."""
+    return [
+        html_card(v["total_eventos"], "📊 Eventos",
+                  "Total de registros filtrados no período e critérios selecionados."),
+        html_card(v["media_resolucao_display"], "⏱️ Resolução",
+                  "Tempo médio para solução completa dos chamados.", "kpi-blue"),
+        html_card(v["media_atendimento_display"], "🕑 Atendimento",
+                  "Tempo médio de início de atendimento após a abertura.", "kpi-blue"),
+        html_card(v["encerrado_value"], "✅ Encerrados",
+                  "Chamados finalizados com atendimento concluído.", v["status_class_solu"]),
+        html_card(v["media_nota_display"], "⭐ Avaliação",
+                  "Média das avaliações (de 1 a 5)", v["nota_class"]),
+    ]
+
+
+def html_cards_percentis(v):
+    """Cards com os percentis de resolução e atendimento (segunda linha do topo)."""
+    return [
+        html_card(v["percentis_resolucao_display"], "⏱️ Resolução p50 · p90 · p99",
+                  "Metade, 90% e 99% dos chamados foram resolvidos em até esse tempo.",
+                  "kpi-blue"),
+        html_card(v["percentis_atendimento_display"], "🕑 Atendimento p50 · p90 · p99",
+                  "Metade, 90% e 99% dos chamados tiveram o atendimento iniciado em até "
+                  "esse tempo.", "kpi-blue"),
+    ]
+
+
+def html_relatorio(v):
+    """Bloco "report-section" do Relatório Inteligente."""
+    pct_solu = v["pct_solu"]
+    qtd_critico = v["qtd_critico"]
+    return f"""
+        <div class="report-section">
+        <h3 style='margin-top: 0;'>🧠 Relatório Inteligente</h3>
+
+        <div class="report-badges-container">
+            <div class="report-badge report-badge-info">
+                📄 Total de chamados:<br><strong>{v["total_eventos"]}</strong>
+            </div>
+            <div class="report-badge report-badge-info">
+                ⏱️ Tempo médio de resolução:<br><strong>{v["media_resolucao_display"]}</strong>
+            </div>
+            <div class="report-badge report-badge-info">
+                🕑 Tempo médio até atendimento:<br><strong>{v["media_atendimento_display"]}</strong>
+            </div>
+        </div>
+
+
+        <div class="report-badges-container">
+            <div class="report-badge report-badge-info">
+            📊 SLA cumprido em <strong>{v["sla_atingido_pct"]:.1f}%</strong> dos chamados.
+            </div>
+            <div class="report-badge report-badge-error">
+            🚨 Abertos: <strong>{v["aberto_value"]}</strong>
+            </div>
+            <div class="report-badge report-badge-warning">
+            🛠️ Em Atendimento: <strong>{v["andamento_value"]}</strong>
+            </div>
+            <div class="report-badge report-badge-success">
+            ✅ Encerrados: <strong>{v["encerrado_value"]}</strong>
+            </div>
+            <div class="report-badge report-badge-error">
+            🔥 Críticos (prioridade alta): <strong>{qtd_critico}</strong>
+            </div>
+        </div>
+
+        <h4>📊 Análise Gráfica</h4>
+        <div class="report-badge report-badge-info">
+            📈 Os gráficos apresentados mostram a distribuição dos chamados ao longo do tempo, destacando os principais setores demandantes e os analistas com maior volume de atendimentos.<br>
+            🔍 Também foi possível observar uma concentração significativa de solicitações em horários específicos (via mapa de calor), e uma forte presença de registros em determinadas lojas da rede.<br>
+            ✅ A distribuição por status evidencia a eficiência do time, enquanto os gráficos de prioridade e SLA ajudam a identificar pontos de atenção estratégicos.
+        </div>
+
+        <h4>💡 Sugestões Estratégicas</h4>
+        <div class="report-badges-container">
+            <div class="report-badge {'report-badge-success' if pct_solu > 85 else 'report-badge-warning'}">
+            {'✅ Ótimo índice de encerramento de chamados.' if pct_solu > 85 else '⚠️ A taxa de encerramento está abaixo do ideal. Avaliar atrasos ou reaberturas.'}
+            </div>
+            <div class="report-badge {'report-badge-success' if qtd_critico <= 10 else 'report-badge-error'}">
+            {'✅ A quantidade de chamados críticos está sob controle.' if qtd_critico <= 10 else '🔥 Alto número de chamados críticos identificados. Priorizar essas demandas.'}
+            </div>
+        </div>
+        </div>
+        """
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from celulas import somar_celulas
+from indices import IndiceFiltros
+
+# Eventos (coluna de data de cada um) e grãos de tempo dos agregados
+EVENTOS = {"abertura": "Abertura", "encerramento": "Encerramento"}
+GRAOS = ["dia", "semana", "mes", "hora_semana"]
+# Month é o mês da Abertura: nos grãos de dia e semana da abertura ele sai do próprio
+# período e fica fora dos rollups (não multiplica as células); o filtro por mês recorta
+# os dias e, na semana, soma os dias recortados por semana
+MES = "Month"
+EVENTO_MES = "abertura"
+GRAOS_SEM_MES = ("dia", "semana")
+
+
+def periodos(datas, grao):
+    """Código inteiro do período de cada data (datas vazias ficam de fora depois).
+
+    dia: dias desde 1970-01-01; semana: dia da segunda-feira da semana ISO;
+    mes: meses desde 1970-01; hora_semana: dia da semana (segunda = 0) * 24 + hora.
+    """
+    valores = datas.to_numpy(dtype="datetime64[ns]")
+    if grao == "mes":
+        return valores.astype("datetime64[M]").astype(np.int64)
+    dias = valores.astype("datetime64[D]").astype(np.int64)
+    if grao == "dia":
+        return dias
+    if grao == "semana":
+        return _semana(dias)
+    horas = valores.astype("datetime64[h]").astype(np.int64) - dias * 24
+    return (dias + 3) % 7 * 24 + horas
+
+
+def _semana(dias):
+    # Dia da segunda-feira da semana ISO (1970-01-01 foi uma quinta-feira)
+    return dias - (dias + 3) % 7
+
+
+def _dias_nos_meses(dias, meses):
+    # Máscara dos dias (código) que caem nos meses "AAAA-MM" escolhidos
+    mes = np.asarray(dias, dtype="datetime64[D]").astype("datetime64[M]")
+    return np.isin(np.datetime_as_string(mes, unit="M"), list(meses))
+
+
+def rotulos(codigos, grao):
+    # Volta do código inteiro para a data (ou posição na semana) que ele representa
+    if grao == "mes":
+        return np.asarray(codigos, dtype="datetime64[M]")
+    if grao in ("dia", "semana"):
+        return np.asarray(codigos, dtype="datetime64[D]")
+    return np.asarray(codigos)
+
+
+def eventos(df, coluna, grao, dimensoes, sinal=1):
+    # Um evento por linha com data: dimensões, código do período e n = sinal
+    datas = df[coluna]
+    validas = datas.notna().to_numpy()
+    contagem = df.loc[validas, list(dimensoes)].copy()
+    contagem["Periodo"] = periodos(datas[validas], grao)
+    contagem["n"] = sinal
+    return contagem
+
+
+def contar(df, coluna, grao, dimensoes):
+    """Quantidade de eventos por período e combinação das dimensões (só células presentes)."""
+    return eventos(df, coluna, grao, dimensoes).groupby(
+        list(dimensoes) + ["Periodo"], observed=True)["n"].sum().reset_index()
+
+
+class Rollup:
+    """Contagens de um evento num grão de tempo, por combinação de um conjunto de dimensões."""
+
+    def __init__(self, celulas, coluna, grao, dimensoes, indice=None, chaves=None):
+        self.coluna = coluna
+        self.grao = grao
+        self.dimensoes = list(dimensoes)
+        self.celulas = celulas
+        self.indice = indice or IndiceFiltros(celulas, self.dimensoes, coluna_tempo=None)
+        # Chave de cada célula (celulas.Chaves), montada na primeira atualização
+        self._chaves = chaves
+
+    @classmethod
+    def de_linhas(cls, df, coluna, grao, dimensoes):
+        return cls(contar(df, coluna, grao, dimensoes), coluna, grao, dimensoes)
+
+    def atualizar(self, removidas, adicionadas):
+        # Eventos das linhas que mudaram (a versão antiga com sinal trocado) somados só
+        # nas células deles; o índice é reaproveitado se nenhuma célula entrou ou saiu
+        delta = pd.concat([
+            eventos(removidas, self.coluna, self.grao, self.dimensoes, sinal=-1),
+            eventos(adicionadas, self.coluna, self.grao, self.dimensoes)], ignore_index=True)
+        celulas, chaves, mesmas = somar_celulas(
+            self.celulas, delta, self.dimensoes + ["Periodo"], ["n"], self._chaves)
+        return Rollup(celulas, self.coluna, self.grao, self.dimensoes,
+                      self.indice if mesmas else None, chaves)
+
+    def serie(self, selecoes):
+        """Série (código do período -> quantidade) das células que passam nos filtros."""
+        celulas = self.celulas.iloc[self.indice.filtrar(selecoes)]
+        return celulas.groupby("Periodo")["n"].sum()
+
+
+class SeriesTempo:
+    """Agregados de abertura e encerramento por dia, semana ISO, mês e hora da semana.
+
+    Cada par (evento, grão) guarda um reticulado como o do CuboKPI: o grão completo
+    das dimensões de filtro e uma versão sem as dimensões de `opcionais`. Os rollups
+    são construídos na primeira consulta e, numa ingestão incremental, os já
+    construídos são atualizados só com as linhas que mudaram.
+    """
+
+    def __init__(self, df, dimensoes, opcionais=("Solicitante",), rollups=None):
+        self.df = df
+        self.dimensoes = list(dimensoes)
+        self.opcionais = tuple(opcionais)
+        self.rollups = dict(rollups or {})
+
+    def _reticulado(self, evento, grao):
+        if (evento, grao) not in self.rollups:
+            coluna = EVENTOS[evento]
+            dimensoes = [c for c in self.dimensoes
+                         if not (c == MES and evento == EVENTO_MES and grao in GRAOS_SEM_MES)]
+            reduzidas = [c for c in dimensoes if c not in self.opcionais]
+            reticulado = [Rollup.de_linhas(self.df, coluna, grao, dimensoes)]
+            if len(reduzidas) < len(dimensoes):
+                reticulado.append(Rollup.de_linhas(self.df, coluna, grao, reduzidas))
+            self.rollups[(evento, grao)] = sorted(reticulado, key=lambda r: len(r.celulas))
+        return self.rollups[(evento, grao)]
+
+    def atualizar(self, removidas, adicionadas, df):
+        rollups = {chave: [r.atualizar(removidas, adicionadas) for r in reticulado]
+                   for chave, reticulado in self.rollups.items()}
+        return SeriesTempo(df, self.dimensoes, self.opcionais, rollups)
+
+    def serie(self, evento, grao, selecoes=None):
+        """Quantidade de eventos por período, indexada pela data (ou hora da semana)."""
+        ativos = {c: v for c, v in (selecoes or {}).items() if v is not None}
+        meses, base = None, grao
+        if MES in ativos and evento == EVENTO_MES and grao in GRAOS_SEM_MES:
+            # Mês filtrado: recorta os dias; a semana soma os dias recortados
+            meses, base = ativos.pop(MES), "dia"
+        for rollup in self._reticulado(evento, base):
+            if set(ativos) <= set(rollup.dimensoes):
+                serie = rollup.serie(ativos)
+                if meses is not None:
+                    serie = serie[_dias_nos_meses(serie.index, meses)]
+                    if grao == "semana":
+                        serie = serie.groupby(_semana(serie.index.to_numpy())).sum()
+                return pd.Series(serie.to_numpy(), index=rotulos(serie.index, grao), name=evento)
+        raise KeyError(f"Nenhum rollup cobre os filtros {sorted(ativos)}")
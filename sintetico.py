@@ -0,0 +1,150 @@
+"""Gerador determinístico de chamados sintéticos, no mesmo formato da planilha.
+
+Uso:
+    python sintetico.py 100000 -o chamados_100k.csv
+    python sintetico.py 1000000 --semente 7 --dias 1095 -o chamados_1m.csv
+
+Mesmas colunas e formatos da planilha publicada (datas "dd/mm/aaaa hh:mm", horas
+"NN,Nh", Nota vazia quando não avaliado), com cardinalidades e assimetria parecidas
+com as reais: poucas lojas e solicitantes concentram a maior parte dos chamados,
+os horários seguem o expediente e o volume cresce ao longo do período. A mesma
+semente gera sempre o mesmo arquivo.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+COLUNAS = ["Abertura", "Loja", "Solicitante", "Status", "Analista", "NV. Prioridade", "SLA",
+           "Setor", "Estado", "Assunto", "Solu. Prevista", "Solu. Real", "Atend. Real",
+           "Encerramento", "Nota"]
+
+STATUS = {"Encerrado": 0.86, "Em aberto": 0.07, "Em atendimento": 0.05, "Aguardando usuário": 0.02}
+# Prioridade -> (peso, SLA em horas, mediana da solução em horas)
+PRIORIDADES = {"Baixa": (0.35, 72, 20.0), "Média": (0.40, 48, 12.0),
+               "Alta": (0.18, 24, 6.0), "Crítico": (0.07, 8, 2.5)}
+ANALISTAS = ["Ana", "Bruno", "Carla", "Diego", "Eva", "Fábio", "Gabriela", "Heitor",
+             "Isabela", "João", "Karina", "Lucas"]
+SETORES = ["Financeiro", "Vendas", "Estoque", "RH", "Compras", "Logística", "Fiscal", "TI"]
+# Grafias como aparecem na planilha (nomes, siglas e erros de digitação)
+ESTADOS = {"São Paulo": 0.30, "SP": 0.05, "Paraná": 0.12, "Santa Catarina": 0.10,
+           "Rio Grande do Sul": 0.09, "Minas Gerais": 0.09, "Rio de Janeiro": 0.07,
+           "Goiás": 0.04, "Bahia": 0.04, "Tocatins": 0.02, "Mato Grosso do Sul": 0.03,
+           "Pernambuco": 0.03, "Distrito Federal": 0.02}
+ASSUNTOS = ["Impressora não imprime", "VPN fora do ar", "PDV travado", "Erro no sistema",
+            "Troca de senha", "Computador não liga", "Sem acesso à internet",
+            "Leitor de código de barras", "Nota fiscal rejeitada", "E-mail não sincroniza",
+            "Instalação de programa", "Acesso ao ERP", "Balança sem comunicação",
+            "Teclado com defeito", "Monitor sem imagem", "Lentidão no sistema",
+            "Backup não executado", "Certificado digital vencido", "Cadastro de usuário",
+            "TEF não conecta", "Etiqueta de preço", "Pasta compartilhada",
+            "Relatório não abre", "Telefone sem linha", "Câmera de segurança"]
+COMPLEMENTOS = ["urgente", "de novo", "na matriz", "após atualização", "desde ontem",
+                "no caixa", "na retaguarda", "para novo funcionário"]
+
+# Peso de cada hora do dia e de cada dia da semana (segunda = 0) na abertura
+PESO_HORA = np.array([1, 1, 1, 1, 1, 2, 4, 10, 30, 45, 48, 42, 25, 30, 44, 45, 40, 32,
+                      18, 10, 6, 4, 2, 1], dtype=float)
+PESO_DIA_SEMANA = np.array([1.15, 1.1, 1.05, 1.0, 0.95, 0.45, 0.2])
+
+
+def _zipf(rng, n, categorias, expoente=1.1):
+    # Sorteio com pesos 1/k^expoente: poucos valores concentram a maioria das linhas
+    pesos = 1 / np.arange(1, len(categorias) + 1) ** expoente
+    ordem = rng.permutation(len(categorias))
+    return np.asarray(categorias, dtype=object)[ordem][
+        rng.choice(len(categorias), n, p=pesos / pesos.sum())]
+
+
+def _sortear(rng, n, pesos):
+    chaves = list(pesos)
+    p = np.array([pesos[c] for c in chaves], dtype=float)
+    return rng.choice(len(chaves), n, p=p / p.sum())
+
+
+def _formatar(valores, formatar):
+    # Formata só os valores distintos (de uma vez) e espalha pelos códigos
+    distintos, codigos = np.unique(valores, return_inverse=True)
+    return np.asarray(formatar(distintos), dtype=object)[codigos]
+
+
+def _datas(minutos, inicio):
+    return _formatar(minutos, lambda m: (inicio + pd.to_timedelta(m, unit="min"))
+                     .strftime("%d/%m/%Y %H:%M"))
+
+
+def _horas(horas):
+    decimos = np.round(horas * 10).astype(np.int64)
+    return _formatar(decimos, lambda d: [f"{x // 10},{x % 10}h" for x in d])
+
+
+def gerar_chamados(n, semente=0, inicio="2024-01-01", dias=730):
+    """`n` chamados sintéticos como texto, na ordem de abertura (igual à planilha)."""
+    rng = np.random.default_rng(semente)
+    inicio = pd.Timestamp(inicio)
+
+    # Abertura: volume crescendo ao longo do período, expediente e dias úteis
+    datas = pd.date_range(inicio, periods=dias, freq="D")
+    peso_dia = PESO_DIA_SEMANA[datas.dayofweek] * np.linspace(0.6, 1.4, dias)
+    dia = np.sort(rng.choice(dias, n, p=peso_dia / peso_dia.sum()))
+    hora = rng.choice(24, n, p=PESO_HORA / PESO_HORA.sum())
+    abertura = dia * 1440 + hora * 60 + rng.integers(0, 60, n)
+    abertura.sort()
+
+    nomes_prioridade = list(PRIORIDADES)
+    prioridade = _sortear(rng, n, {p: v[0] for p, v in PRIORIDADES.items()})
+    sla_horas = np.array([v[1] for v in PRIORIDADES.values()])[prioridade]
+    mediana = np.array([v[2] for v in PRIORIDADES.values()])[prioridade]
+    solucao = np.minimum(rng.lognormal(np.log(mediana), 0.9), 999.9)
+    atendimento = np.minimum(solucao * rng.beta(2, 5, n), solucao)
+
+    status = _sortear(rng, n, STATUS)
+    encerrado = status == 0
+    encerramento = np.where(encerrado, _datas(abertura + np.round(solucao * 60).astype(np.int64),
+                                              inicio), "")
+    # Nota: só chamados encerrados, cerca de 40% avaliados, concentrada em 4 e 5
+    avaliado = encerrado & (rng.random(n) < 0.4)
+    nota = np.where(avaliado, rng.choice([1, 2, 3, 4, 5], n, p=[0.04, 0.06, 0.15, 0.35, 0.40]),
+                    np.nan)
+
+    assunto = _zipf(rng, n, ASSUNTOS, 0.9)
+    complemento = rng.random(n) < 0.25
+    assunto[complemento] = (assunto[complemento] + " - "
+                            + _zipf(rng, int(complemento.sum()), COMPLEMENTOS))
+
+    n_lojas = int(np.clip(n / 2000, 20, 400))
+    n_solicitantes = int(np.clip(n / 50, 50, 20000))
+    return pd.DataFrame({
+        "Abertura": _datas(abertura, inicio),
+        "Loja": _zipf(rng, n, [f"Loja {i:03d}" for i in range(1, n_lojas + 1)]),
+        "Solicitante": _zipf(rng, n, [f"Solicitante {i:05d}" for i in range(1, n_solicitantes + 1)]),
+        "Status": np.asarray(list(STATUS), dtype=object)[status],
+        "Analista": _zipf(rng, n, ANALISTAS, 0.6),
+        "NV. Prioridade": np.asarray(nomes_prioridade, dtype=object)[prioridade],
+        "SLA": _formatar(sla_horas, lambda h: [f"{x}h" for x in h]),
+        "Setor": _zipf(rng, n, SETORES, 0.8),
+        "Estado": np.asarray(list(ESTADOS), dtype=object)[_sortear(rng, n, ESTADOS)],
+        "Assunto": assunto,
+        "Solu. Prevista": _datas(abertura + sla_horas * 60, inicio),
+        "Solu. Real": _horas(solucao),
+        "Atend. Real": _horas(atendimento),
+        "Encerramento": encerramento,
+        "Nota": nota,
+    }, columns=COLUNAS)
+
+
+def gravar_csv(df, caminho):
+    df.to_csv(caminho, index=False, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("linhas", type=int)
+    parser.add_argument("-o", "--saida", help="arquivo CSV (padrão: saída padrão)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--inicio", default="2024-01-01")
+    parser.add_argument("--dias", type=int, default=730)
+    args = parser.parse_args()
+    gravar_csv(gerar_chamados(args.linhas, args.semente, args.inicio, args.dias),
+               args.saida or sys.stdout)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from dados import DERIVACOES
+
+TAMANHOS_PAGINA = [25, 50, 100, 200]
+# Colunas criadas na carga (as demais vêm da planilha, mesmo quando convertidas)
+COLUNAS_DERIVADAS = [nome for nome, _ in DERIVACOES
+                     if nome not in ("Solu. Prevista", "Encerramento")]
+
+
+def colunas_padrao(df):
+    return [c for c in df.columns if c not in COLUNAS_DERIVADAS]
+
+
+def ordem_coluna(serie, crescente=True):
+    """Posições de todas as linhas ordenadas por `serie`, com os vazios no fim."""
+    codigos, _ = pd.factorize(serie, sort=True)
+    vazio = codigos.max() + 1 if len(codigos) else 0
+    if not crescente:
+        codigos = np.where(codigos >= 0, vazio - 1 - codigos, codigos)
+    codigos = np.where(codigos >= 0, codigos, vazio)
+    return np.argsort(codigos, kind="stable")
+
+
+def ordenar(ordem, mascara):
+    # Percorre a ordem global (pré-calculada) guardando só as linhas da máscara: sem sort
+    return ordem[mascara[ordem]]
+
+
+def buscar(df, posicoes, texto, colunas):
+    """Mantém as posições cujas colunas de texto contêm `texto` (sem diferenciar caixa)."""
+    texto = texto.strip()
+    if not texto:
+        return posicoes
+    achou = np.zeros(len(posicoes), dtype=bool)
+    for coluna in colunas:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Procura só no dicionário da coluna e depois compara os códigos
+            categorias = serie.cat.categories.astype(str)
+            codigos = np.flatnonzero(categorias.str.contains(texto, case=False, regex=False))
+            achou |= np.isin(serie.cat.codes.to_numpy()[posicoes], codigos)
+        elif pd.api.types.is_string_dtype(serie.dtype):
+            trecho = serie.iloc[posicoes].str.contains(texto, case=False, regex=False)
+            achou |= trecho.fillna(False).to_numpy(dtype=bool)
+    return posicoes[achou]
+
+
+def pagina(df, posicoes, numero, tamanho, colunas):
+    """Recorte de uma página (começando em 1) das linhas em `posicoes`, só com `colunas`."""
+    inicio = (numero - 1) * tamanho
+    return df.iloc[posicoes[inicio:inicio + tamanho], [df.columns.get_loc(c) for c in colunas]]
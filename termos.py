@@ -0,0 +1,118 @@
+import bisect
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Mesma regra de palavras do WordCloud (2+ caracteres, apóstrofo no meio)
+PADRAO_PALAVRA = re.compile(r"\w[\w']+")
+# Na busca vale qualquer começo de palavra, mesmo de uma letra
+PADRAO_BUSCA = re.compile(r"\w[\w']*")
+
+# Palavras vazias em português (as do WordCloud são só em inglês)
+STOPWORDS_PT = frozenset("""
+a à ao aos as às até com como da das de dela dele deles do dos e é ela elas ele
+eles em entre era essa esse esta está estão este eu foi for há isso isto já la
+lhe mais mas me mesmo meu minha muito na não nas nem no nos nós num numa o os ou
+para pela pelas pelo pelos por qual quando que quem se sem ser seu sua são só
+também te tem tá um uma umas uns vai via vou
+""".split())
+
+
+def normalizar(texto):
+    # Minúsculas e sem acento (NFKD sem os caracteres combinantes)
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto, stopwords=STOPWORDS_PT):
+    palavras = [p[:-2] if p.lower().endswith("'s") else p
+                for p in PADRAO_PALAVRA.findall(texto)]
+    return [p for p in palavras if not p.isdigit() and p.lower() not in stopwords]
+
+
+class IndiceTermos:
+    """Frequência de termos do `Assunto` por chamado, construída uma vez por versão.
+
+    Os assuntos se repetem muito, então cada texto distinto é tokenizado uma única
+    vez e os chamados apontam para o código do seu texto. A matriz esparsa
+    texto x termo fica em formato de coordenadas (`textos`, `termos`, `contagens`);
+    as frequências de um filtro são a soma das linhas dos chamados selecionados,
+    feita com dois `np.bincount`.
+
+    Também guarda o índice invertido da busca por assunto: palavras normalizadas
+    (sem acento e em minúsculas, incluindo as palavras vazias) em ordem alfabética,
+    cada uma com os códigos dos textos onde aparece, e as linhas agrupadas por texto.
+    """
+
+    def __init__(self, assuntos, stopwords=STOPWORDS_PT):
+        codigos, distintos = pd.factorize(assuntos, use_na_sentinel=True)
+        self.codigos = codigos
+        self.n_textos = len(distintos)
+
+        ids = {}
+        grafias = []
+        textos, termos, contagens = [], [], []
+        for i, texto in enumerate(distintos):
+            for termo, qtd in Counter(tokenizar(str(texto), stopwords)).items():
+                chave = termo.lower()
+                if chave not in ids:
+                    ids[chave] = len(ids)
+                    grafias.append(Counter())
+                grafias[ids[chave]][termo] += qtd
+                textos.append(i)
+                termos.append(ids[chave])
+                contagens.append(qtd)
+        self.textos = np.asarray(textos, dtype=np.int64)
+        self.termos = np.asarray(termos, dtype=np.int64)
+        self.contagens = np.asarray(contagens, dtype=np.float64)
+        # Cada termo aparece na grafia mais comum (como no WordCloud)
+        self.vocabulario = [g.most_common(1)[0][0] for g in grafias]
+
+        # Índice invertido: palavra normalizada -> textos; prefixos viram um
+        # intervalo contíguo da lista ordenada de palavras
+        postagens = {}
+        for i, texto in enumerate(distintos):
+            for palavra in set(PADRAO_BUSCA.findall(normalizar(str(texto)))):
+                postagens.setdefault(palavra, []).append(i)
+        self.palavras = sorted(postagens)
+        self.postagens = [np.asarray(postagens[p], dtype=np.int64) for p in self.palavras]
+        # Linhas de cada texto (lista de linhas agrupada por código, como no IndiceFiltros)
+        self.ordem = np.argsort(codigos, kind="stable")
+        self.limites = np.searchsorted(codigos[self.ordem], np.arange(self.n_textos + 1))
+
+    def frequencias(self, posicoes=None):
+        """Dicionário termo -> ocorrências nas linhas em `posicoes` (todas se None)."""
+        codigos = self.codigos if posicoes is None else self.codigos[posicoes]
+        por_texto = np.bincount(codigos[codigos >= 0], minlength=self.n_textos)
+        soma = np.bincount(self.termos, weights=self.contagens * por_texto[self.textos],
+                           minlength=len(self.vocabulario))
+        presentes = np.flatnonzero(soma)
+        return {self.vocabulario[t]: float(soma[t]) for t in presentes}
+
+    def _textos(self, prefixo):
+        ini = bisect.bisect_left(self.palavras, prefixo)
+        fim = bisect.bisect_left(self.palavras, prefixo + "\uffff")
+        if ini == fim:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(self.postagens[ini:fim]))
+
+    def buscar(self, consulta):
+        """Posições (ordenadas) das linhas cujo assunto tem todas as palavras da consulta.
+
+        Cada palavra da consulta casa com qualquer palavra do assunto que comece com
+        ela, sem diferenciar acento ou caixa. Consulta vazia devolve None (sem filtro).
+        """
+        prefixos = PADRAO_BUSCA.findall(normalizar(consulta))
+        if not prefixos:
+            return None
+        textos = self._textos(prefixos[0])
+        for prefixo in prefixos[1:]:
+            textos = np.intersect1d(textos, self._textos(prefixo), assume_unique=True)
+        if len(textos) == 0:
+            return np.empty(0, dtype=np.int64)
+        linhas = np.concatenate([self.ordem[self.limites[t]:self.limites[t + 1]] for t in textos])
+        linhas.sort()
+        return linhas